@@ -16,8 +16,18 @@ class Config:
         self.target_endpoint = os.getenv('TARGET_ENDPOINT', 'https://your-llm-endpoint.com/v1')
         self.target_api_key = os.getenv('TARGET_API_KEY')
         self.use_placeholder_mode = os.getenv('USE_PLACEHOLDER_MODE', 'false').lower() == 'true'
+        self.upstream_connect_timeout = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', '10'))
         self.strip_zero_temperature = os.getenv('STRIP_ZERO_TEMPERATURE', 'true').lower() == 'true'
 
+        # Streaming - merge SSE events arriving within this window into one write (0 = off)
+        self.sse_coalesce_ms = int(os.getenv('SSE_COALESCE_MS', '0'))
+        # Upstream stream bytes read ahead of a slow client before reading pauses (0 = read inline)
+        self.stream_buffer_bytes = int(os.getenv('STREAM_BUFFER_BYTES', str(10 * 1024 * 1024)))
+
+        # Response cache for deterministic non-streaming chat requests (0 = off)
+        self.response_cache_size = int(os.getenv('RESPONSE_CACHE_SIZE', '0'))
+        self.response_cache_ttl = float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+
         # Model configuration
         self.available_models = self._parse_models(os.getenv('AVAILABLE_MODELS', 'gpt-4,gpt-4-turbo,gpt-4o,gpt-4o-mini,gpt-3.5-turbo'))
         self.default_model = os.getenv('DEFAULT_MODEL', 'gpt-4')
@@ -40,7 +50,7 @@ class Config:
 
     def _parse_model_mapping(self, mapping_str: str) -> dict:
         """Parse model mapping from environment (format: source=target,source2=target2)."""
-        mapping = {}
+        mapping: dict = {}
         if not mapping_str:
             return mapping
 
@@ -1,22 +1,54 @@
 """Logging manager for API calls and server events."""
 
 import time
+import queue
+import threading
+import orjson
 from collections import deque
-from typing import Dict, List, Any
+from typing import Deque, Dict, List, Any, Tuple
 
 
 class LoggerManager:
     """Manages in-memory logs for API calls and server events."""
 
-    def __init__(self, max_logs: int = 100):
+    def __init__(self, max_logs: int = 100, queue_size: int = 1024):
         self.max_logs = max_logs
-        self.api_calls = deque(maxlen=max_logs)
-        self.server_events = deque(maxlen=max_logs)
+        self.api_calls: Deque[Dict[str, Any]] = deque(maxlen=max_logs)
+        self.server_events: Deque[Dict[str, Any]] = deque(maxlen=max_logs)
+
+        # API calls queued from request threads, recorded by a background worker
+        self.dropped_api_calls = 0
+        self._log_q: 'queue.Queue[Tuple[Any, ...]]' = queue.Queue(maxsize=queue_size)
+        self._worker = threading.Thread(target=self._drain_api_calls, name='api-call-logger', daemon=True)
+        self._worker.start()
 
     def log_api_call(self, method: str, path: str, status: int, duration_ms: int, request_data: Any = None, response_data: Any = None):
         """Log an API call."""
+        self._record_api_call(time.time(), method, path, status, duration_ms, request_data, response_data)
+
+    def enqueue(self, method: str, path: str, status: int, duration_ms: int, request_data: Any = None, response_data: Any = None):
+        """Queue an API call for the background worker without blocking the caller."""
+        try:
+            self._log_q.put_nowait((time.time(), method, path, status, duration_ms, request_data, response_data))
+        except queue.Full:
+            self.dropped_api_calls += 1
+
+    def _drain_api_calls(self):
+        """Record queued API calls (runs on the worker thread)."""
+        while True:
+            self._record_api_call(*self._log_q.get())
+
+    def _record_api_call(self, timestamp: float, method: str, path: str, status: int, duration_ms: int, request_data: Any, response_data: Any):
+        """Store an API call entry."""
+        # Forwarded bodies arrive as raw upstream bytes; decode them here, off the request path
+        if isinstance(response_data, (bytes, bytearray)):
+            try:
+                response_data = orjson.loads(response_data)
+            except orjson.JSONDecodeError:
+                response_data = bytes(response_data).decode(errors='replace')
+
         self.api_calls.append({
-            'timestamp': time.time(),
+            'timestamp': timestamp,
             'method': method,
             'path': path,
             'status': status,
@@ -40,6 +40,11 @@ class OAuthManager:
 
             return self._access_token
 
+    @property
+    def expires_at(self) -> Optional[float]:
+        """Wall-clock expiry of the current token, or None if there isn't one."""
+        return self._expires_at
+
     def _needs_refresh(self) -> bool:
         """Check if token needs to be refreshed."""
         if not self._expires_at:
@@ -93,7 +98,7 @@ class OAuthManager:
                 try:
                     error_data = response.json()
                     error_detail = f": {error_data}"
-                except:
+                except ValueError:
                     error_detail = f": {response.text}"
 
                 logger.error(f"OAuth token request failed with {response.status_code}{error_detail}")
@@ -21,10 +21,13 @@ import os
 import sys
 import json
 import logging
+import math
 import time
 from datetime import datetime
 from typing import Optional, Dict, Any
+import orjson
 from flask import Flask, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -41,8 +44,27 @@ logger = logging.getLogger(__name__)
 # Check if we're in dev mode
 DEV_MODE = os.getenv('DEV_MODE', 'false').lower() == 'true'
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify() uses the C serializer."""
+
+    # Key order is left as built; sorting would cost time on every response
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            # Flask asks for indented output in debug mode
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 # Initialize Flask app
 app = Flask(__name__, static_folder='dashboard', static_url_path='')
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Import our modules
@@ -193,6 +215,21 @@ def get_model(model_id):
     return request_handler.get_model(model_id)
 
 
+def _cache_ttl_override():
+    """Per-request response cache TTL from the X-Cache-TTL header, if valid."""
+    value = request.headers.get('X-Cache-TTL')
+    if value is None:
+        return None
+    try:
+        ttl = float(value)
+    except ValueError:
+        return None
+    # nan/inf would never compare as expired; use the default TTL instead
+    if not math.isfinite(ttl):
+        return None
+    return max(ttl, 0.0)
+
+
 @app.route('/v1/chat/completions', methods=['POST'])
 def chat_completions():
     """Handle chat completion requests."""
@@ -200,7 +237,7 @@ def chat_completions():
     if not valid:
         return jsonify(error), 401
 
-    return request_handler.chat_completions(request.get_json())
+    return request_handler.chat_completions(request.get_json(), cache_ttl=_cache_ttl_override())
 
 
 @app.route('/v1/completions', methods=['POST'])
@@ -1,28 +1,255 @@
 """Request handler for OpenAI API endpoints."""
 
+import re
 import time
+import hashlib
 import uuid
 import logging
+import threading
+import orjson
 import requests
-from typing import Optional, Dict, Any
-from flask import jsonify, Response, stream_with_context
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict, deque
+from typing import Optional, Callable, Dict, Any, Deque, Iterator, List, Tuple, Union
+from flask import jsonify, Response
+
+from config import Config
+from logger_manager import LoggerManager
+from oauth_manager import OAuthManager
 
 logger = logging.getLogger(__name__)
 
+# What route handlers return: a response, optionally paired with a status code
+HandlerResult = Union[Response, Tuple[Response, int]]
+ChatHandler = Callable[[Optional[Dict[str, Any]], Optional[float]], HandlerResult]
+
+# Terminal SSE event sent by OpenAI-compatible streams
+_DATA_DONE = b'data: [DONE]'
+
+# Pulls the first finish_reason out of a raw response body without parsing it
+_FINISH_REASON_RE = re.compile(rb'"finish_reason"\s*:\s*"([^"]*)"')
+
+# Upper bound on coalesced SSE output held back before a write
+_SSE_COALESCE_MAX_BYTES = 16384
+
+# The model list is fixed for the life of the process, so clients may cache it
+_MODELS_CACHE_HEADERS = {'Cache-Control': 'public, max-age=300'}
+
+# Read size for streamed upstream bodies, which are forwarded as raw bytes
+_UPSTREAM_READ_SIZE = 16384
+
+# Content streamed word by word in placeholder mode
+_PLACEHOLDER_STREAM_MESSAGE = "This is a placeholder streaming response from the local LLM proxy."
+_PLACEHOLDER_EVENTS_PER_WRITE = 8
+
+
+def _json_response(obj: Any, status: int = 200) -> Response:
+    """Serialize obj with orjson into a JSON response."""
+    return Response(orjson.dumps(obj), status=status, content_type='application/json')
+
+
+# Sent upstream in dev mode instead of real credentials
+_DEV_AUTH_HEADER = 'Bearer dev-mock-token'
+
+# Validation errors are static, so serialize them once
+_ERR_NO_MODEL = orjson.dumps({
+    "error": {
+        "message": "you must provide a model parameter",
+        "type": "invalid_request_error",
+        "param": "model",
+        "code": None
+    }
+})
+_ERR_NO_MESSAGES = orjson.dumps({
+    "error": {
+        "message": "you must provide a messages parameter",
+        "type": "invalid_request_error",
+        "param": "messages",
+        "code": None
+    }
+})
+
+_ERR_EMPTY_UPSTREAM = orjson.dumps({"error": {"message": "Empty response from target"}})
+
+# Connection errors only vary by message, which is spliced between these
+_ERR_CONN_PREFIX = b'{"error":{"message":'
+_ERR_CONN_SUFFIX = b',"type":"connection_error","param":null,"code":"target_connection_failed"}}'
+
+
+def _connection_error(e: Exception) -> bytes:
+    """Build the connection_error body for a failed upstream request."""
+    return _ERR_CONN_PREFIX + orjson.dumps(f"Failed to connect to target endpoint: {e}") + _ERR_CONN_SUFFIX
+
+
+class _UpstreamReader:
+    """Reads a streamed upstream body on a background thread into a bounded buffer.
+
+    Decouples the upstream read from the client write: a slow client no longer
+    stalls the read from the target until max_bytes are waiting to be sent.
+    """
+
+    def __init__(self, response: requests.Response, max_bytes: int):
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self._max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._done = False
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._reader = threading.Thread(target=self._read, args=(response,), name='upstream-reader', daemon=True)
+        self._reader.start()
+
+    def _read(self, response: requests.Response) -> None:
+        """Fill the buffer from the upstream body (runs on the reader thread)."""
+        try:
+            for chunk in response.iter_content(chunk_size=_UPSTREAM_READ_SIZE):
+                if not chunk:
+                    continue
+                with self._cond:
+                    while self._size >= self._max_bytes and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    self._chunks.append(chunk)
+                    self._size += len(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                if not self._closed:
+                    self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def chunks(self, idle_timeout: Optional[float] = None) -> Iterator[bytes]:
+        """Yield buffered chunks as they arrive.
+
+        With an idle_timeout, an empty chunk is yielded whenever that long
+        passes with nothing new, so the caller can flush held-back output.
+        """
+        while True:
+            with self._cond:
+                while not self._chunks and not self._done:
+                    if not self._cond.wait(idle_timeout) and not self._chunks and not self._done:
+                        break
+                if not self._chunks and not self._done:
+                    chunk = b''
+                elif self._chunks:
+                    chunk = self._chunks.popleft()
+                    self._size -= len(chunk)
+                    self._cond.notify_all()
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            yield chunk
+
+    def close(self) -> None:
+        """Stop the reader thread; anything still buffered is discarded."""
+        with self._cond:
+            self._closed = True
+            self._chunks.clear()
+            self._cond.notify_all()
+
+
+class _ResponseCache:
+    """Thread-safe LRU of upstream response bodies with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries: 'OrderedDict[bytes, Tuple[float, bytes, str]]' = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request_data: Dict[str, Any]) -> bytes:
+        """Hash a request so the same request always maps to the same entry."""
+        return hashlib.sha256(orjson.dumps(request_data, option=orjson.OPT_SORT_KEYS)).digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[bytes, str]]:
+        """Return (body, content_type) for a live entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: bytes, body: bytes, content_type: str, ttl_seconds: Optional[float] = None) -> None:
+        """Store a body, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self._ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, body, content_type)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _is_cacheable(request_data: Dict[str, Any]) -> bool:
+    """Whether a chat request should give the same answer every time.
+
+    Call on the request as the client sent it: an unset temperature means the
+    upstream default, which samples, so only an explicit 0 or a seed counts.
+    """
+    if request_data.get('stream') or request_data.get('n') not in (None, 1):
+        return False
+    temperature = request_data.get('temperature')
+    return (temperature is not None and temperature == 0) or request_data.get('seed') is not None
+
 
 class RequestHandler:
     """Handles OpenAI API requests and forwards to target endpoint."""
 
-    def __init__(self, config, oauth_manager, log_manager, dev_mode=False):
-        self.config = config
-        self.oauth_manager = oauth_manager
-        self.log_manager = log_manager
-        self.dev_mode = dev_mode
+    def __init__(self, config: Config, oauth_manager: Optional[OAuthManager], log_manager: LoggerManager, dev_mode: bool = False):
+        self.config: Config = config
+        self.oauth_manager: Optional[OAuthManager] = oauth_manager
+        self.log_manager: LoggerManager = log_manager
+        self.dev_mode: bool = dev_mode
+
+        # Shared session so TCP/TLS connections to the target are kept alive and reused
+        self.session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=256, max_retries=Retry(total=0))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Target URLs are fixed by config
+        self._chat_url: str = f"{config.target_endpoint}/chat/completions"
+        self._completions_url: str = f"{config.target_endpoint}/completions"
+
+        # Authorization headers: static ones are built once, the OAuth one is
+        # reused until its token is due for refresh
+        self._api_key_auth_header: Optional[str] = (
+            f'Bearer {config.target_api_key}' if config.is_api_key_configured() else None
+        )
+        self._oauth_auth_header: Optional[str] = None
+        self._oauth_auth_valid_until: float = 0.0
 
         # Build models list from config
-        self.models = self._build_models_list()
+        self.models: List[Dict[str, Any]] = self._build_models_list()
+        self.models_by_id: Dict[str, Dict[str, Any]] = {m["id"]: m for m in self.models}
+
+        # The models never change after startup, so serialize the payloads once
+        self._models_bytes: bytes = orjson.dumps({"object": "list", "data": self.models})
+        self._model_bytes: Dict[str, bytes] = {m["id"]: orjson.dumps(m) for m in self.models}
+
+        # The placeholder stream's content never changes, so pre-encode its deltas
+        self._placeholder_content_deltas: Tuple[bytes, ...] = self._build_placeholder_content_deltas()
+
+        # Optional cache of deterministic, non-streaming chat responses
+        self._response_cache: Optional[_ResponseCache] = (
+            _ResponseCache(config.response_cache_size, config.response_cache_ttl)
+            if config.response_cache_size > 0 and not config.use_placeholder_mode else None
+        )
+
+        # Chat completions handler with this config's branches resolved up front
+        self._chat_handler: ChatHandler = self._build_chat_handler()
 
-    def _build_models_list(self):
+    def _build_models_list(self) -> List[Dict[str, Any]]:
         """Build models list from configuration."""
         models = []
         base_timestamp = 1687882410  # Base timestamp for model creation
@@ -37,16 +264,22 @@ class RequestHandler:
 
         return models
 
-    def list_models(self):
+    def _build_placeholder_content_deltas(self) -> Tuple[bytes, ...]:
+        """Pre-encode the placeholder stream's content chunks (the part after the chunk head)."""
+        words = _PLACEHOLDER_STREAM_MESSAGE.split()
+        deltas = []
+        for i, word in enumerate(words):
+            content = word + (" " if i < len(words) - 1 else "")
+            deltas.append(b'{"content":' + orjson.dumps(content) + b'},"finish_reason":null}]}\n\n')
+        return tuple(deltas)
+
+    def list_models(self) -> HandlerResult:
         """List available models."""
-        return jsonify({
-            "object": "list",
-            "data": self.models
-        })
+        return Response(self._models_bytes, content_type='application/json', headers=_MODELS_CACHE_HEADERS)
 
-    def get_model(self, model_id: str):
+    def get_model(self, model_id: str) -> HandlerResult:
         """Get specific model details."""
-        model = next((m for m in self.models if m["id"] == model_id), None)
+        model = self._model_bytes.get(model_id)
 
         if not model:
             return jsonify({
@@ -58,146 +291,152 @@ class RequestHandler:
                 }
             }), 404
 
-        return jsonify(model)
+        return Response(model, content_type='application/json', headers=_MODELS_CACHE_HEADERS)
 
-    def chat_completions(self, request_data: Dict):
-        """Handle chat completion requests."""
-        start_time = time.time()
+    def chat_completions(self, request_data: Optional[Dict[str, Any]], cache_ttl: Optional[float] = None) -> HandlerResult:
+        """Handle chat completion requests.
 
-        # Strip temperature=0 if configured (some models don't support it)
-        if self.config.strip_zero_temperature and request_data:
-            temp = request_data.get('temperature')
-            if temp is not None and temp == 0:
-                logger.info(f"Removing temperature=0 (STRIP_ZERO_TEMPERATURE=true)")
-                request_data.pop('temperature', None)
+        cache_ttl overrides the response cache TTL for this call (0 bypasses the cache).
+        """
+        return self._chat_handler(request_data, cache_ttl)
 
-        # Inject max_tokens if not set (Codex doesn't send it, causing truncation)
-        if request_data and 'max_tokens' not in request_data:
-            default_max_tokens = self.config.max_tokens
-            request_data['max_tokens'] = default_max_tokens
-            logger.info(f"Injected max_tokens={default_max_tokens} (not set by client)")
+    def _build_chat_handler(self) -> ChatHandler:
+        """Build the chat completions handler specialized for this config.
 
-        # Validate required fields
-        if not request_data or not request_data.get('model'):
-            error_response = jsonify({
-                "error": {
-                    "message": "you must provide a model parameter",
-                    "type": "invalid_request_error",
-                    "param": "model",
-                    "code": None
-                }
-            })
-            duration_ms = int((time.time() - start_time) * 1000)
-            self.log_manager.log_api_call('POST', '/v1/chat/completions', 400, duration_ms, request_data, None)
-            return error_response, 400
+        Config doesn't change after startup, so settings are read once here and
+        the placeholder-vs-forward choice is made once instead of per request.
+        """
+        strip_zero_temperature = self.config.strip_zero_temperature
+        default_max_tokens = self.config.max_tokens
+        enqueue = self.log_manager.enqueue
+        respond = self._placeholder_chat_response if self.config.use_placeholder_mode else self._forward_chat_request
+        cache = self._response_cache
 
-        if not request_data.get('messages'):
-            error_response = jsonify({
-                "error": {
-                    "message": "you must provide a messages parameter",
-                    "type": "invalid_request_error",
-                    "param": "messages",
-                    "code": None
-                }
-            })
-            duration_ms = int((time.time() - start_time) * 1000)
-            self.log_manager.log_api_call('POST', '/v1/chat/completions', 400, duration_ms, request_data, None)
-            return error_response, 400
+        def handle(request_data: Optional[Dict[str, Any]], cache_ttl: Optional[float] = None) -> HandlerResult:
+            start_time = time.time()
 
-        # Check mode
-        if self.config.use_placeholder_mode:
-            logger.debug("Using placeholder response")
-            return self._placeholder_chat_response(request_data, start_time)
+            # Decided before the request is rewritten below, which can drop temperature=0
+            cacheable = cache is not None and cache_ttl != 0 and request_data is not None and _is_cacheable(request_data)
+
+            # Strip temperature=0 if configured (some models don't support it)
+            if strip_zero_temperature and request_data:
+                temp = request_data.get('temperature')
+                if temp is not None and temp == 0:
+                    logger.info(f"Removing temperature=0 (STRIP_ZERO_TEMPERATURE=true)")
+                    request_data.pop('temperature', None)
 
-        # Forward to target
-        return self._forward_chat_request(request_data, start_time)
+            # Inject max_tokens if not set (Codex doesn't send it, causing truncation)
+            if request_data and 'max_tokens' not in request_data:
+                request_data['max_tokens'] = default_max_tokens
+                logger.info(f"Injected max_tokens={default_max_tokens} (not set by client)")
 
-    def completions(self, request_data: Dict):
+            # Validate required fields
+            if not request_data or not request_data.get('model'):
+                enqueue('POST', '/v1/chat/completions', 400, int((time.time() - start_time) * 1000), request_data, None)
+                return Response(_ERR_NO_MODEL, status=400, content_type='application/json')
+
+            if not request_data.get('messages'):
+                enqueue('POST', '/v1/chat/completions', 400, int((time.time() - start_time) * 1000), request_data, None)
+                return Response(_ERR_NO_MESSAGES, status=400, content_type='application/json')
+
+            # Serve repeated deterministic requests from the cache when enabled
+            cache_key = None
+            if cache is not None and cacheable:
+                cache_key = cache.key(request_data)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    body, content_type = cached
+                    logger.info("← served from response cache")
+                    enqueue('POST', '/v1/chat/completions', 200, int((time.time() - start_time) * 1000), request_data, body)
+                    return Response(body, status=200, content_type=content_type, headers={'X-Cache': 'HIT'})
+
+            # Placeholder response or forward to target, as chosen above
+            result = respond(request_data, start_time)
+
+            if cache is not None and cache_key is not None and isinstance(result, Response) and result.status_code == 200 and not result.is_streamed:
+                cache.put(cache_key, result.get_data(), result.content_type, cache_ttl)
+
+            return result
+
+        return handle
+
+    def completions(self, request_data: Optional[Dict[str, Any]]) -> HandlerResult:
         """Handle text completion requests."""
         start_time = time.time()
 
         if not request_data or not request_data.get('model'):
-            return jsonify({
-                "error": {
-                    "message": "you must provide a model parameter",
-                    "type": "invalid_request_error",
-                    "param": "model",
-                    "code": None
-                }
-            }), 400
+            return Response(_ERR_NO_MODEL, status=400, content_type='application/json')
 
         if self.config.use_placeholder_mode:
             return self._placeholder_completion_response(request_data, start_time)
 
         return self._forward_completion_request(request_data, start_time)
 
-    def _forward_chat_request(self, request_data: Dict, start_time: float):
+    def _forward_chat_request(self, request_data: Dict[str, Any], start_time: float) -> HandlerResult:
         """Forward chat completion request to target endpoint."""
+        # Bind request fields once; the streaming generator closes over these
+        messages = request_data.get('messages') or []
+        model = request_data.get('model')
+        max_tokens_req = request_data.get('max_tokens')
+        tools = request_data.get('tools') or []
+        is_streaming = request_data.get('stream', False)
+
         try:
-            target_url = f"{self.config.target_endpoint}/chat/completions"
+            target_url = self._chat_url
             headers = {'Content-Type': 'application/json'}
 
             # Add authorization
             self._add_authorization_header(headers)
 
-            # Check if streaming is requested
-            is_streaming = request_data.get('stream', False)
+            # Serialize once with orjson instead of letting requests use stdlib json
+            body = orjson.dumps(request_data)
 
             # Log request details for debugging
-            messages = request_data.get('messages', [])
             num_messages = len(messages)
-            max_tokens_req = request_data.get('max_tokens', 'not set')
-            model = request_data.get('model', 'not set')
-            tools = request_data.get('tools', [])
-            tool_choice = request_data.get('tool_choice', 'not set')
-
-            # Check messages for tool_calls and tool results
-            has_assistant_tool_calls = False
-            has_tool_results = False
-            for msg in messages:
-                if msg.get('role') == 'assistant' and 'tool_calls' in msg:
-                    has_assistant_tool_calls = True
-                if msg.get('role') == 'tool':
-                    has_tool_results = True
-
-            # Estimate prompt size (rough approximation: 1 token ≈ 4 chars)
-            total_chars = sum(len(str(msg.get('content', ''))) for msg in messages)
-            estimated_prompt_tokens = total_chars // 4
+            max_tokens_label = max_tokens_req if max_tokens_req is not None else 'not set'
+
+            # Estimate prompt size from the encoded body (rough approximation: 1 token ≈ 4 bytes)
+            estimated_prompt_tokens = len(body) // 4
 
             # Concise INFO logging for production
             tool_info = f", tools={len(tools)}" if tools else ""
-            logger.info(f"→ {model} | msgs={num_messages}, max_tokens={max_tokens_req}{tool_info} | streaming={is_streaming}")
+            logger.info(f"→ {model} | msgs={num_messages}, max_tokens={max_tokens_label}{tool_info} | streaming={is_streaming}")
 
             # Detailed DEBUG logging
             if tools:
-                logger.debug(f"Tools: {len(tools)} defined, choice={tool_choice}")
+                logger.debug(f"Tools: {len(tools)} defined, choice={request_data.get('tool_choice', 'not set')}")
                 for i, tool in enumerate(tools):
                     tool_name = tool.get('function', {}).get('name', 'unknown')
                     logger.debug(f"  Tool {i+1}: {tool_name}")
 
-            if has_assistant_tool_calls:
-                logger.debug(f"Message history includes assistant tool_calls")
-            if has_tool_results:
-                logger.debug(f"Message history includes tool results")
+            # Only walk the message history when the breakdown will be logged
+            if logger.isEnabledFor(logging.DEBUG):
+                if any(msg.get('role') == 'assistant' and 'tool_calls' in msg for msg in messages):
+                    logger.debug(f"Message history includes assistant tool_calls")
+                if any(msg.get('role') == 'tool' for msg in messages):
+                    logger.debug(f"Message history includes tool results")
 
             logger.debug(f"Estimated prompt size: ~{estimated_prompt_tokens:,} tokens")
 
             # Warn if max_tokens not set
-            if max_tokens_req == 'not set':
+            if max_tokens_req is None:
                 logger.warning("!!! max_tokens NOT SET in request - gateway may use low default !!!")
                 logger.warning("Codex config should set max_tokens (check ~/.codex/config.toml)")
 
             # For streaming, use longer timeout and keep connection alive
             if is_streaming:
                 timeout_seconds = 600  # 10 minutes for long responses
+                # Ask for an uncompressed stream so chunks aren't buffered for gzip
+                headers['Accept-Encoding'] = 'identity'
             else:
                 timeout_seconds = 120
 
-            response = requests.post(
+            response = self.session.post(
                 target_url,
-                json=request_data,
+                data=body,
                 headers=headers,
-                timeout=timeout_seconds,
+                # Fail fast on unreachable targets instead of pinning the worker thread
+                timeout=(self.config.upstream_connect_timeout, timeout_seconds),
                 stream=is_streaming  # Enable streaming if requested
             )
 
@@ -205,88 +444,102 @@ class RequestHandler:
 
             if not response.ok:
                 logger.error(f"Target returned {response.status_code}")
-                try:
-                    error_data = response.json()
-                except:
-                    error_data = {"error": {"message": response.text or "Empty response from target"}}
-
-                self.log_manager.log_api_call('POST', '/v1/chat/completions', response.status_code, duration_ms, request_data, error_data)
-                return jsonify(error_data), response.status_code
+                error_body = self._upstream_error_body(response)
+                self.log_manager.enqueue('POST', '/v1/chat/completions', response.status_code, duration_ms, request_data, error_body)
+                return Response(error_body, status=response.status_code, content_type='application/json')
 
             # Handle streaming responses
             if is_streaming:
                 logger.debug("Starting to stream response from target...")
-
-                def generate():
+                coalesce_seconds = self.config.sse_coalesce_ms / 1000
+                stream_buffer_bytes = self.config.stream_buffer_bytes
+
+                def generate() -> Iterator[bytes]:
+                    chunk_count = 0
+                    response_chars = 0  # Total content length streamed
+                    response_preview = bytearray()  # First 200 bytes of content, for logs
+                    actual_prompt_tokens = None  # Will be set when usage arrives
+                    stream_finish_reason = None  # Last finish_reason seen
+                    tool_call_names = set()  # Names seen in tool_call deltas
+                    client_disconnected = False
+                    reader = _UpstreamReader(response, stream_buffer_bytes) if stream_buffer_bytes > 0 else None
+                    upstream = reader.chunks(coalesce_seconds or None) if reader is not None else response.iter_content(chunk_size=_UPSTREAM_READ_SIZE)
                     try:
-                        chunk_count = 0
-                        full_response_text = ""
-                        actual_prompt_tokens = None  # Will be set when usage arrives
-                        accumulated_tool_calls = {}  # Track tool calls by index
-                        for chunk in response.iter_lines():
-                            if chunk:
+                        pending = bytearray()  # Coalesced events not yet sent
+                        last_flush = time.monotonic()
+                        carry = b''  # Partial line left over from the previous read
+                        for raw in upstream:
+                            if not raw:
+                                # Upstream went quiet: send whatever coalescing held back
+                                if pending:
+                                    yield bytes(pending)
+                                    pending.clear()
+                                    last_flush = time.monotonic()
+                                continue
+
+                            # Forward raw bytes untouched; lines are only split out
+                            # so the events can be inspected for logging
+                            lines = (carry + raw).split(b'\n')
+                            carry = lines.pop()
+                            flush = False
+                            for line in lines:
+                                chunk = line.rstrip(b'\r')
+                                if not chunk:
+                                    continue
+
                                 chunk_count += 1
                                 if chunk_count == 1:
-                                    logger.debug(f"First chunk received: {chunk[:100]}")
+                                    logger.debug(f"First chunk received: {chunk[:100]!r}")
                                 elif chunk_count % 50 == 0:
                                     logger.debug(f"Received {chunk_count} chunks so far...")
 
-                                # Try to extract content from chunk for debugging
-                                try:
-                                    import json
-                                    if chunk.startswith(b'data: ') and not b'[DONE]' in chunk:
-                                        chunk_json = json.loads(chunk[6:])  # Skip "data: "
+                                # Flush coalesced output at the end of the stream
+                                if chunk == _DATA_DONE:
+                                    flush = True
+                                    continue
+
+                                # Keepalives and anything that isn't a JSON object
+                                # payload have nothing to inspect, so skip the parse entirely
+                                if chunk.startswith(b'data: {') and chunk.endswith(b'}'):
+                                    # Try to extract content from chunk for debugging
+                                    try:
+                                        chunk_json = orjson.loads(chunk[6:])  # Skip "data: "
+                                    except orjson.JSONDecodeError as parse_error:
+                                        # Log parsing errors instead of silently ignoring
+                                        logger.debug(f"[CHUNK {chunk_count}] Could not parse chunk: {parse_error}")
+                                    else:
                                         if 'choices' in chunk_json and len(chunk_json['choices']) > 0:
                                             choice = chunk_json['choices'][0]
                                             delta = choice.get('delta', {})
                                             content = delta.get('content', '')
                                             if content:
-                                                full_response_text += content
+                                                response_chars += len(content)
+                                                if len(response_preview) < 200:
+                                                    response_preview += content.encode()[:200 - len(response_preview)]
 
-                                            # Check for tool calls (including empty arrays)
-                                            if 'tool_calls' in delta:
+                                            # Track tool call names; requests without tools can't emit them
+                                            if tools and 'tool_calls' in delta:
                                                 logger.debug(f"[CHUNK {chunk_count}] tool_calls in delta")
-                                                if delta['tool_calls'] and len(delta['tool_calls']) > 0:
-                                                    # Accumulate tool call data
-                                                    for tc_delta in delta['tool_calls']:
-                                                        tc_index = tc_delta.get('index', 0)
-                                                        if tc_index not in accumulated_tool_calls:
-                                                            accumulated_tool_calls[tc_index] = {
-                                                                'id': tc_delta.get('id', ''),
-                                                                'type': tc_delta.get('type', 'function'),
-                                                                'function': {
-                                                                    'name': '',
-                                                                    'arguments': ''
-                                                                }
-                                                            }
-
-                                                        # Update accumulated data
-                                                        if 'id' in tc_delta:
-                                                            accumulated_tool_calls[tc_index]['id'] = tc_delta['id']
-                                                        if 'type' in tc_delta:
-                                                            accumulated_tool_calls[tc_index]['type'] = tc_delta['type']
-                                                        if 'function' in tc_delta:
-                                                            if 'name' in tc_delta['function']:
-                                                                accumulated_tool_calls[tc_index]['function']['name'] = tc_delta['function']['name']
-                                                            if 'arguments' in tc_delta['function']:
-                                                                accumulated_tool_calls[tc_index]['function']['arguments'] += tc_delta['function']['arguments']
-
-                                                    logger.debug(f"[CHUNK {chunk_count}] Tool call data: {delta['tool_calls']}")
+                                                for tc_delta in delta['tool_calls'] or ():
+                                                    function = tc_delta.get('function')
+                                                    if function and 'name' in function:
+                                                        tool_call_names.add(function['name'])
 
                                             # Check finish_reason
                                             finish_reason = choice.get('finish_reason')
                                             if finish_reason:
                                                 logger.info(f"← finish_reason={finish_reason}")
+                                                stream_finish_reason = finish_reason
+                                                flush = True
                                                 if finish_reason == 'tool_calls':
-                                                    if accumulated_tool_calls:
-                                                        tool_names = [tc.get('function', {}).get('name', '?') for tc in accumulated_tool_calls.values()]
-                                                        logger.info(f"  Tool calls: {', '.join(tool_names)}")
-                                                    logger.debug(f"Full choice: {json.dumps(choice, indent=2)}")
+                                                    if tool_call_names:
+                                                        logger.info(f"  Tool calls: {', '.join(tool_call_names)}")
+                                                    logger.debug(f"Full choice: {orjson.dumps(choice, option=orjson.OPT_INDENT_2).decode()}")
                                                 elif finish_reason == 'length':
-                                                    logger.error(f"Response TRUNCATED (finish_reason=length, max_tokens={max_tokens_req})")
-                                                    if accumulated_tool_calls:
+                                                    logger.error(f"Response TRUNCATED (finish_reason=length, max_tokens={max_tokens_label})")
+                                                    if tool_call_names:
                                                         logger.error(f"  Incomplete tool calls detected!")
-                                                    logger.debug(f"Response so far: {full_response_text[:200]}")
+                                                    logger.debug(f"Response so far: {bytes(response_preview).decode(errors='replace')}")
 
                                         # Log usage if present
                                         if 'usage' in chunk_json:
@@ -304,45 +557,59 @@ class RequestHandler:
                                             elif prompt_tokens > 230000:
                                                 logger.warning(f"Prompt approaching limit: {prompt_tokens:,}/256k tokens")
 
-                                            if comp_tokens < 10 and not accumulated_tool_calls:
+                                            if comp_tokens < 10 and not tool_call_names:
                                                 logger.warning(f"Suspiciously short response: {comp_tokens} tokens")
-                                except Exception as parse_error:
-                                    # Log parsing errors instead of silently ignoring
-                                    logger.debug(f"[CHUNK {chunk_count}] Could not parse chunk: {parse_error}")
 
-                                # SSE format requires \n\n after each event
-                                # iter_lines() strips newlines, so we add both back
-                                yield chunk + b'\n\n'
+                            if not coalesce_seconds:
+                                yield raw
+                                continue
+
+                            pending += raw
+                            now = time.monotonic()
+                            if flush or len(pending) >= _SSE_COALESCE_MAX_BYTES or now - last_flush >= coalesce_seconds:
+                                yield bytes(pending)
+                                pending.clear()
+                                last_flush = now
 
-                        logger.debug(f"Stream complete: {chunk_count} chunks, {len(full_response_text)} chars")
+                        if pending:
+                            yield bytes(pending)
 
-                        # Log accumulated tool calls at DEBUG level
-                        if accumulated_tool_calls:
-                            logger.debug(f"Accumulated {len(accumulated_tool_calls)} tool calls")
-                            for idx, tc in accumulated_tool_calls.items():
-                                func_name = tc.get('function', {}).get('name', 'unknown')
-                                func_args = tc.get('function', {}).get('arguments', '')
-                                logger.debug(f"  [{idx}] {func_name}: {func_args[:100]}")
+                        logger.debug(f"Stream complete: {chunk_count} chunks, {response_chars} chars")
+
+                        if tool_call_names:
+                            logger.debug(f"Tool calls seen: {', '.join(tool_call_names)}")
 
                         if chunk_count == 0:
                             logger.warning("No chunks received from target!")
-
-                        response.close()
                     except GeneratorExit:
                         logger.warning(f"Client disconnected ({chunk_count} chunks sent)")
+                        client_disconnected = True
                     except Exception as e:
                         logger.error(f"Streaming error: {e}")
                         logger.debug(f"Traceback:", exc_info=True)
-                        # Send error as SSE
-                        error_chunk = f'data: {{"error": {{"message": "{str(e)}"}}}}\n\n'
-                        yield error_chunk.encode('utf-8')
+                        # Send error as SSE (orjson escapes quotes in the message)
+                        yield b'data: ' + orjson.dumps({"error": {"message": str(e)}}) + b'\n\n'
+                    finally:
+                        # Always release the connection back to the session pool
+                        if reader is not None:
+                            reader.close()
+                        response.close()
 
-                # Log streaming request (no response data yet)
-                self.log_manager.log_api_call('POST', '/v1/chat/completions', 200, duration_ms, request_data, {"streaming": True})
+                        # Log the streaming request once the stream is over, with its totals
+                        self.log_manager.enqueue('POST', '/v1/chat/completions', 200, int((time.time() - start_time) * 1000), request_data, {
+                            "streaming": True,
+                            "chunks": chunk_count,
+                            "response_chars": response_chars,
+                            "finish_reason": stream_finish_reason,
+                            "prompt_tokens": actual_prompt_tokens,
+                            "tool_calls": sorted(tool_call_names),
+                            "client_disconnected": client_disconnected
+                        })
 
                 return Response(
-                    stream_with_context(generate()),
-                    content_type='text/event-stream',
+                    generate(),
+                    direct_passthrough=True,
+                    content_type=response.headers.get('Content-Type', 'text/event-stream'),
                     headers={
                         'Cache-Control': 'no-cache',
                         'X-Accel-Buffering': 'no',
@@ -350,199 +617,184 @@ class RequestHandler:
                     }
                 ), 200
 
-            # Parse response JSON with better error handling (non-streaming)
-            try:
-                response_data = response.json()
-            except Exception as json_err:
-                logger.error(f"Failed to parse target response as JSON: {json_err}")
+            # Non-streaming: forward the upstream body verbatim instead of
+            # parsing it into dicts only to serialize it straight back
+            body = response.content
+            if not body.lstrip().startswith(b'{'):
+                logger.error("Target response is not a JSON object")
                 logger.error(f"Response status: {response.status_code}")
                 logger.error(f"Response body (first 500 chars): {response.text[:500]}")
                 error_data = {
                     "error": {
-                        "message": f"Target returned invalid JSON: {str(json_err)}",
+                        "message": "Target returned invalid JSON: expected a JSON object",
                         "type": "invalid_response_error",
                         "response_preview": response.text[:200]
                     }
                 }
-                self.log_manager.log_api_call('POST', '/v1/chat/completions', 500, duration_ms, request_data, error_data)
-                return jsonify(error_data), 500
-
-            # Log non-streaming response
-            if 'choices' in response_data and len(response_data['choices']) > 0:
-                choice = response_data['choices'][0]
-                message = choice.get('message', {})
-                finish_reason = choice.get('finish_reason', 'unknown')
-
-                logger.info(f"← finish_reason={finish_reason}")
-
-                if 'tool_calls' in message:
-                    tool_calls = message['tool_calls']
-                    tool_names = [tc.get('function', {}).get('name', '?') for tc in tool_calls]
-                    logger.info(f"  Tool calls: {', '.join(tool_names)}")
+                self.log_manager.enqueue('POST', '/v1/chat/completions', 500, duration_ms, request_data, error_data)
+                return _json_response(error_data, 500)
 
-                if 'content' in message and message.get('content'):
-                    content = message['content']
-                    logger.debug(f"Content: {content[:100]}")
+            # Log non-streaming response; only tool calls or debug output need a full parse
+            finish_match = _FINISH_REASON_RE.search(body)
+            finish_reason = finish_match.group(1).decode() if finish_match else 'unknown'
+            logger.info(f"← finish_reason={finish_reason}")
 
-            self.log_manager.log_api_call('POST', '/v1/chat/completions', 200, duration_ms, request_data, response_data)
-            return jsonify(response_data), 200
+            if finish_reason == 'tool_calls' or logger.isEnabledFor(logging.DEBUG):
+                try:
+                    response_data = orjson.loads(body)
+                except orjson.JSONDecodeError as json_err:
+                    logger.debug(f"Could not parse target response for logging: {json_err}")
+                else:
+                    choices = response_data.get('choices') or ()
+                    message = choices[0].get('message', {}) if choices else {}
+
+                    if 'tool_calls' in message:
+                        tool_calls = message['tool_calls']
+                        tool_names = [tc.get('function', {}).get('name', '?') for tc in tool_calls]
+                        logger.info(f"  Tool calls: {', '.join(tool_names)}")
+
+                    if 'content' in message and message.get('content'):
+                        content = message['content']
+                        logger.debug(f"Content: {content[:100]}")
+
+            # The log worker decodes the raw body in the background
+            self.log_manager.enqueue('POST', '/v1/chat/completions', 200, duration_ms, request_data, body)
+            return Response(body, status=200, content_type=response.headers.get('Content-Type', 'application/json'))
 
         except Exception as e:
             logger.error(f"Error forwarding request: {e}")
             duration_ms = int((time.time() - start_time) * 1000)
-            error_data = {
-                "error": {
-                    "message": f"Failed to connect to target endpoint: {str(e)}",
-                    "type": "connection_error",
-                    "param": None,
-                    "code": "target_connection_failed"
-                }
-            }
-            self.log_manager.log_api_call('POST', '/v1/chat/completions', 500, duration_ms, request_data, error_data)
-            return jsonify(error_data), 500
+            error_body = _connection_error(e)
+            self.log_manager.enqueue('POST', '/v1/chat/completions', 500, duration_ms, request_data, error_body)
+            return Response(error_body, status=500, content_type='application/json')
 
-    def _forward_completion_request(self, request_data: Dict, start_time: float):
+    def _forward_completion_request(self, request_data: Dict[str, Any], start_time: float) -> HandlerResult:
         """Forward text completion request to target endpoint."""
         try:
-            target_url = f"{self.config.target_endpoint}/completions"
+            target_url = self._completions_url
             headers = {'Content-Type': 'application/json'}
 
             self._add_authorization_header(headers)
 
-            response = requests.post(
+            response = self.session.post(
                 target_url,
-                json=request_data,
+                data=orjson.dumps(request_data),
                 headers=headers,
-                timeout=120
+                timeout=(self.config.upstream_connect_timeout, 120)
             )
 
             if not response.ok:
-                try:
-                    error_data = response.json()
-                except:
-                    error_data = {"error": {"message": response.text}}
+                return Response(self._upstream_error_body(response), status=response.status_code, content_type='application/json')
 
-                return jsonify(error_data), response.status_code
-
-            response_data = response.json()
-            return jsonify(response_data), 200
+            response_data = orjson.loads(response.content)
+            return _json_response(response_data)
 
         except Exception as e:
             logger.error(f"Error forwarding request: {e}")
-            return jsonify({
-                "error": {
-                    "message": f"Failed to connect to target endpoint: {str(e)}",
-                    "type": "connection_error",
-                    "param": None,
-                    "code": "target_connection_failed"
-                }
-            }), 500
-
-    def _add_authorization_header(self, headers: Dict[str, str]):
+            return Response(_connection_error(e), status=500, content_type='application/json')
+
+    @staticmethod
+    def _upstream_error_body(response: requests.Response) -> bytes:
+        """Body to return for a failed upstream call.
+
+        JSON error objects are passed through as-is; anything else (HTML from a
+        gateway, plain text, nothing) is wrapped in an OpenAI-style error.
+        """
+        body = response.content
+        if not body:
+            return _ERR_EMPTY_UPSTREAM
+        if 'json' in response.headers.get('Content-Type', '') and body.lstrip().startswith(b'{'):
+            return body
+        return orjson.dumps({"error": {"message": body[:500].decode('utf-8', 'replace')}})
+
+    def _add_authorization_header(self, headers: Dict[str, str]) -> None:
         """Add authorization header to request."""
         if self.dev_mode:
             # Dev mode: use mock token
-            headers['Authorization'] = 'Bearer dev-mock-token'
+            headers['Authorization'] = _DEV_AUTH_HEADER
             logger.debug("Using dev mock token")
             return
 
         # Priority 1: OAuth
         if self.oauth_manager:
+            if self._oauth_auth_header and time.time() < self._oauth_auth_valid_until:
+                headers['Authorization'] = self._oauth_auth_header
+                return
+
             try:
                 token = self.oauth_manager.get_token()
                 if token:
-                    headers['Authorization'] = f'Bearer {token}'
+                    self._oauth_auth_header = f'Bearer {token}'
+                    # Go back to the manager once it would start refreshing the token
+                    expires_at = self.oauth_manager.expires_at
+                    self._oauth_auth_valid_until = expires_at - self.oauth_manager.refresh_buffer_seconds if expires_at else 0.0
+                    headers['Authorization'] = self._oauth_auth_header
                     logger.debug("Using OAuth token")
                     return
             except Exception as e:
                 logger.error(f"Failed to get OAuth token: {e}")
 
         # Priority 2: Simple API key
-        if self.config.is_api_key_configured():
-            headers['Authorization'] = f'Bearer {self.config.target_api_key}'
+        if self._api_key_auth_header:
+            headers['Authorization'] = self._api_key_auth_header
             logger.debug("Using static API key")
             return
 
         logger.warning("No authentication configured for target endpoint")
 
-    def _placeholder_chat_response(self, request_data: Dict, start_time: float):
+    def _placeholder_chat_response(self, request_data: Dict[str, Any], start_time: float) -> HandlerResult:
         """Return placeholder chat completion response."""
         completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
         created = int(time.time())
         is_streaming = request_data.get('stream', False)
+        model = request_data.get("model", self.config.default_model)
 
         logger.info(f"Placeholder response - streaming: {is_streaming}")
 
         # Handle streaming placeholder response
         if is_streaming:
-            import json
+            # Everything except the delta is fixed for the whole stream, so
+            # serialize it once and splice each word into prebuilt bytes
+            chunk_head = (
+                b'data: {"id":"' + completion_id.encode() +
+                b'","object":"chat.completion.chunk","created":' + str(created).encode() +
+                b',"model":' + orjson.dumps(model) +
+                b',"choices":[{"index":0,"delta":'
+            )
+            chunk_role = chunk_head + b'{"role":"assistant"},"finish_reason":null}]}\n\n'
+            chunk_final = chunk_head + b'{},"finish_reason":"stop"}]}\n\n'
 
-            def generate_placeholder_stream():
-                logger.info("Starting placeholder stream generation...")
+            def generate_placeholder_stream() -> Iterator[bytes]:
+                debug = logger.isEnabledFor(logging.DEBUG)
 
                 # Send initial chunk with role
-                chunk_role = {
-                    "id": completion_id,
-                    "object": "chat.completion.chunk",
-                    "created": created,
-                    "model": request_data.get("model", self.config.default_model),
-                    "choices": [{
-                        "index": 0,
-                        "delta": {"role": "assistant"},
-                        "finish_reason": None
-                    }]
-                }
-                chunk_data = f"data: {json.dumps(chunk_role)}\n\n".encode('utf-8')
-                logger.info(f"Sending role chunk: {chunk_data[:100]}")
-                yield chunk_data
-
-                # Send content in chunks (simulating streaming)
-                message = "This is a placeholder streaming response from the local LLM proxy."
-                words = message.split()
-                logger.info(f"Sending {len(words)} content chunks...")
-                for i, word in enumerate(words):
-                    content = word + (" " if i < len(words) - 1 else "")
-                    chunk_content = {
-                        "id": completion_id,
-                        "object": "chat.completion.chunk",
-                        "created": created,
-                        "model": request_data.get("model", self.config.default_model),
-                        "choices": [{
-                            "index": 0,
-                            "delta": {"content": content},
-                            "finish_reason": None
-                        }]
-                    }
-                    chunk_data = f"data: {json.dumps(chunk_content)}\n\n".encode('utf-8')
-                    if i == 0:
-                        logger.info(f"First content chunk: {chunk_data[:100]}")
-                    yield chunk_data
-
-                # Send final chunk
-                chunk_final = {
-                    "id": completion_id,
-                    "object": "chat.completion.chunk",
-                    "created": created,
-                    "model": request_data.get("model", self.config.default_model),
-                    "choices": [{
-                        "index": 0,
-                        "delta": {},
-                        "finish_reason": "stop"
-                    }]
-                }
-                chunk_data = f"data: {json.dumps(chunk_final)}\n\n".encode('utf-8')
-                logger.info(f"Sending final chunk: {chunk_data[:100]}")
-                yield chunk_data
-
-                logger.info("Sending [DONE]")
-                yield b"data: [DONE]\n\n"
-                logger.info("Stream complete!")
+                if debug:
+                    logger.debug("Sending role chunk: %r", chunk_role[:100])
+                yield chunk_role
+
+                # Send content in chunks (simulating streaming), several events per write
+                deltas = self._placeholder_content_deltas
+                for start in range(0, len(deltas), _PLACEHOLDER_EVENTS_PER_WRITE):
+                    parts = []
+                    for content_delta in deltas[start:start + _PLACEHOLDER_EVENTS_PER_WRITE]:
+                        parts.append(chunk_head)
+                        parts.append(content_delta)
+                    yield b''.join(parts)
+
+                # Send final chunk together with [DONE]
+                if debug:
+                    logger.debug("Sending final chunk: %r", chunk_final[:100])
+                yield chunk_final + b"data: [DONE]\n\n"
+                logger.debug("Placeholder stream complete")
+
+            logger.debug("Streaming %d placeholder content chunks", len(self._placeholder_content_deltas))
 
             duration_ms = int((time.time() - start_time) * 1000)
-            self.log_manager.log_api_call('POST', '/v1/chat/completions', 200, duration_ms, request_data, {"streaming": True, "placeholder": True})
+            self.log_manager.enqueue('POST', '/v1/chat/completions', 200, duration_ms, request_data, {"streaming": True, "placeholder": True})
 
             return Response(
-                stream_with_context(generate_placeholder_stream()),
+                generate_placeholder_stream(),
+                direct_passthrough=True,
                 content_type='text/event-stream',
                 headers={
                     'Cache-Control': 'no-cache',
@@ -555,7 +807,7 @@ class RequestHandler:
             "id": completion_id,
             "object": "chat.completion",
             "created": created,
-            "model": request_data.get("model", self.config.default_model),
+            "model": model,
             "choices": [{
                 "index": 0,
                 "message": {
@@ -572,11 +824,11 @@ class RequestHandler:
         }
 
         duration_ms = int((time.time() - start_time) * 1000)
-        self.log_manager.log_api_call('POST', '/v1/chat/completions', 200, duration_ms, request_data, response)
+        self.log_manager.enqueue('POST', '/v1/chat/completions', 200, duration_ms, request_data, response)
 
         return jsonify(response), 200
 
-    def _placeholder_completion_response(self, request_data: Dict, start_time: float):
+    def _placeholder_completion_response(self, request_data: Dict[str, Any], start_time: float) -> HandlerResult:
         """Return placeholder text completion response."""
         completion_id = f"cmpl-{uuid.uuid4().hex[:24]}"
         created = int(time.time())
@@ -5,23 +5,37 @@ Interactive Web Scraping Agent using Crawl4AI.
 This agent provides an interactive REPL interface for web scraping with LLM-powered extraction.
 """
 
+import argparse
 import asyncio
+import hashlib
 import json
 import logging
 import os
+import shlex
 import sys
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from functools import cached_property
+from itertools import islice
+from typing import Callable, Optional, Deque, Dict, Any, Iterable, List, Tuple, Type
 from pathlib import Path
+from urllib.parse import urlparse
 
 try:
-    from crawl4ai import AsyncWebCrawler, LLMExtractionStrategy, LLMConfig, CrawlerRunConfig
+    from crawl4ai import AsyncWebCrawler, BrowserConfig, LLMExtractionStrategy, LLMConfig, CrawlerRunConfig
     from crawl4ai.extraction_strategy import JsonCssExtractionStrategy, NoExtractionStrategy
-    from pydantic import BaseModel, Field, create_model
+    from pydantic import BaseModel, Field, ValidationError, create_model
+    import aiofiles
 except ImportError:
     print("ERROR: crawl4ai not installed. Run: pip install -r requirements.txt")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from logger_manager import LoggerManager
 
 # Setup logging
@@ -31,6 +45,179 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Browser tab reused by single-page commands (scrape/extract) across the session
+SESSION_ID = "scraper_repl"
+
+# LLM results kept in memory; older entries are still read back from disk
+_LLM_CACHE_SIZE = 256
+
+# Operations kept in session history; older entries are dropped
+_HISTORY_SIZE = 1000
+
+# Characters of extracted content shown after a REPL scrape
+_PREVIEW_CHARS = 500
+
+# Crawl results up to this much markdown are saved with a single write
+_SAVE_JOIN_MAX_BYTES = 4 * 1024 * 1024
+
+# Schema type names accepted by extract, as create_model field definitions;
+# anything else is treated as str. Pydantic copies the Field per model, so
+# sharing these across models is safe.
+_FIELD_MAP = {
+    "str": (str, Field(...)),
+    "int": (int, Field(...)),
+    "float": (float, Field(...)),
+    "bool": (bool, Field(...)),
+    "list": (List[str], Field(...)),
+}
+
+
+def _link_url(link: Any) -> Optional[str]:
+    """Return the URL of a link entry (crawl4ai reports links as dicts with an "href")."""
+    if isinstance(link, dict):
+        return link.get("href")
+    return link
+
+
+def _validate_extracted(model: Type[BaseModel], data: Any) -> Any:
+    """Validate (and coerce) extracted items against the schema's model.
+
+    Validated fields replace the item's values; keys outside the schema are
+    kept. crawl4ai's error items, non-dict items and items that fail
+    validation are returned unchanged.
+    """
+    items = data if isinstance(data, list) else [data]
+    validated = []
+    for item in items:
+        if not isinstance(item, dict) or item.get("error"):
+            validated.append(item)
+            continue
+        try:
+            validated.append({**item, **model.model_validate(item).model_dump()})
+        except ValidationError as e:
+            logger.warning(f"Extracted item doesn't match schema: {e.error_count()} error(s)")
+            validated.append(item)
+    return validated if isinstance(data, list) else validated[0]
+
+
+def _build_css_strategy(css_selectors: Dict[str, str]) -> JsonCssExtractionStrategy:
+    """Build a strategy reading each field's text from the page with its CSS selector."""
+    return JsonCssExtractionStrategy(schema={
+        "name": "auto",
+        "baseSelector": "body",
+        "fields": [
+            {"name": field_name, "selector": selector, "type": "text"}
+            for field_name, selector in css_selectors.items()
+        ]
+    })
+
+
+class _ReplUsageError(Exception):
+    """Raised instead of exiting when a REPL command's arguments don't parse."""
+
+
+class _ReplArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser that reports errors to the REPL instead of exiting."""
+
+    def error(self, message):
+        raise _ReplUsageError(message)
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _build_parsers() -> Dict[str, argparse.ArgumentParser]:
+    """Build the argument parser for each REPL command that takes arguments."""
+    scrape = _ReplArgumentParser(prog="scrape", add_help=False)
+    scrape.add_argument("url")
+    scrape.add_argument("--llm", metavar="PROMPT", help="Extract with the LLM using this prompt")
+    scrape.add_argument("--no-cache", action="store_true")
+
+    extract = _ReplArgumentParser(prog="extract", add_help=False)
+    extract.add_argument("url")
+    extract.add_argument("schema", help="JSON object of field name to type")
+    extract.add_argument("--instruction")
+    extract.add_argument("--css", metavar="SELECTORS", help="JSON object of field name to CSS selector")
+    extract.add_argument("--no-cache", action="store_true")
+
+    crawl = _ReplArgumentParser(prog="crawl", add_help=False)
+    crawl.add_argument("url")
+    crawl.add_argument("--depth", type=int, default=2)
+    crawl.add_argument("--max", type=int, default=10)
+    crawl.add_argument("--concurrency", type=_positive_int, default=5)
+    crawl.add_argument("--delay", type=float, default=0.0)
+
+    save = _ReplArgumentParser(prog="save", add_help=False)
+    save.add_argument("filename", nargs="?")
+    save.add_argument("--format", choices=("json", "md", "txt"), default="json")
+
+    export = _ReplArgumentParser(prog="export", add_help=False)
+    export.add_argument("format", nargs="?", choices=("json", "md", "txt"), default="json")
+
+    return {"scrape": scrape, "extract": extract, "crawl": crawl, "save": save, "export": export}
+
+
+def _clear_screen():
+    """Clear the terminal with ANSI escapes; only legacy Windows consoles shell out to cls."""
+    if not sys.stdout.isatty():
+        return
+    if os.name == 'nt' and os.environ.get("WT_SESSION") is None:
+        os.system('cls')
+        return
+    sys.stdout.write("\x1b[2J\x1b[H")
+    sys.stdout.flush()
+
+
+class _Utf8Text:
+    """Text held as UTF-8 bytes (crawled page markdown); .text decodes it on first use."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    @cached_property
+    def text(self) -> str:
+        return self.data.decode('utf-8')
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize values JSON has no type for; _Utf8Text becomes its text."""
+    if isinstance(obj, _Utf8Text):
+        # Decoded without caching, so saving doesn't keep a str copy alive
+        return obj.data.decode('utf-8')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _loads(data: Any) -> Any:
+    """Parse JSON text or bytes, with orjson when it's installed.
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch
+    the latter either way.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_indented(data: Any) -> bytes:
+    """Serialize data as indented JSON bytes, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, default=_json_default).encode('utf-8')
+
 
 class ScraperAgent:
     """Interactive web scraping agent with Crawl4AI."""
@@ -47,10 +234,61 @@ class ScraperAgent:
         self.last_result = None
         self.output_dir = Path("scraper_output")
         self.output_dir.mkdir(exist_ok=True)
-        self.session_history = []
+        self.session_history: Deque[Dict[str, Any]] = deque(maxlen=_HISTORY_SIZE)
+
+        # LLM extraction results by request hash: in memory, backed by output_dir/.cache
+        self._llm_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.cache_dir = self.output_dir / ".cache"
+
+        # One browser for the whole session, started on first use (see _get_crawler)
+        self._crawler: Optional[AsyncWebCrawler] = None
+
+        # REPL command parsers and handlers, built once
+        self._parsers = _build_parsers()
+        self._handlers = {
+            "exit": self._cmd_exit,
+            "quit": self._cmd_exit,
+            "help": self._cmd_help,
+            "config": self._cmd_config,
+            "history": self._cmd_history,
+            "clear": self._cmd_clear,
+            "scrape": self._cmd_scrape,
+            "extract": self._cmd_extract,
+            "crawl": self._cmd_crawl,
+            "save": self._cmd_save,
+            "export": self._cmd_save,
+        }
+
+        # Extraction models keyed by schema signature (see _get_extraction_model)
+        self._model_cache: Dict[Tuple[Tuple[str, str], ...], Tuple[Type[BaseModel], Dict[str, Any]]] = {}
+
+        # Session run configs for scrape/extract (keyed by command and strategy
+        # inputs) and for crawl fetch slots
+        self._run_config_cache: Dict[Tuple, CrawlerRunConfig] = {}
 
         logger.info("✓ Scraper agent initialized")
 
+    async def _get_crawler(self) -> AsyncWebCrawler:
+        """Return the shared crawler, starting its browser on first use."""
+        if self._crawler is None:
+            browser_config = BrowserConfig(
+                headless=True,
+                verbose=False,
+                viewport_width=800,
+                viewport_height=600,
+                extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"]
+            )
+            crawler = AsyncWebCrawler(config=browser_config)
+            await crawler.start()
+            self._crawler = crawler
+        return self._crawler
+
+    async def aclose(self):
+        """Shut down the shared browser, if it was started."""
+        if self._crawler is not None:
+            crawler, self._crawler = self._crawler, None
+            await crawler.close()
+
     def _log_event(self, level: str, message: str, data: Any = None):
         """Log an event to both console and dashboard."""
         if level == "info":
@@ -63,13 +301,73 @@ class ScraperAgent:
         if self.log_manager:
             self.log_manager.log_server_event(level, message, data)
 
-    async def scrape(self, url: str, use_llm: bool = False, prompt: Optional[str] = None) -> Dict[str, Any]:
+    def _cache_key(self, command: str, url: str, **inputs: Any) -> str:
+        """Hash an LLM request into a cache key.
+
+        inputs must name every argument that changes the command's result;
+        the command, URL and model are always part of the key.
+        """
+        payload = json.dumps([command, url, self.llm_config.provider, inputs], sort_keys=True)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached LLM result, in memory first and then on disk."""
+        response = self._llm_cache.get(key)
+        if response is not None:
+            self._llm_cache.move_to_end(key)
+            return response
+
+        cache_file = self.cache_dir / f"{key}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file) as f:
+                response = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {cache_file}: {e}")
+            return None
+
+        self._cache_remember(key, response)
+        return response
+
+    def _cache_put(self, key: str, response: Dict[str, Any]):
+        """Store an LLM result in memory and on disk."""
+        self._cache_remember(key, response)
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            with open(self.cache_dir / f"{key}.json", 'w') as f:
+                json.dump(response, f)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write cache entry: {e}")
+
+    def _cache_remember(self, key: str, response: Dict[str, Any]):
+        """Add a result to the in-memory LRU, evicting the oldest entry when full."""
+        self._llm_cache[key] = response
+        self._llm_cache.move_to_end(key)
+        if len(self._llm_cache) > _LLM_CACHE_SIZE:
+            self._llm_cache.popitem(last=False)
+
+    def _use_cached(self, kind: str, url: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a cache hit as the latest result and return it."""
+        self._log_event("info", f"✓ Using cached result for {url}")
+        self.last_result = response
+        self.session_history.append({
+            "type": kind,
+            "url": url,
+            "timestamp": datetime.now().isoformat(),
+            "success": True,
+            "cached": True
+        })
+        return response
+
+    async def scrape(self, url: str, use_llm: bool = False, prompt: Optional[str] = None, use_cache: bool = True) -> Dict[str, Any]:
         """Scrape a single webpage.
 
         Args:
             url: URL to scrape
             use_llm: Whether to use LLM for extraction
             prompt: Optional prompt for LLM extraction
+            use_cache: Reuse a previous LLM result for the same URL and prompt
 
         Returns:
             Dictionary with scraping results
@@ -77,31 +375,41 @@ class ScraperAgent:
         self._log_event("info", f"🔍 Scraping: {url}")
 
         try:
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
 
-            # Configure extraction strategy
-            extraction_strategy = None
+            # LLM results are cached by URL and prompt
+            cache_key = None
+            if use_llm and prompt and use_cache:
+                cache_key = self._cache_key("scrape", url, prompt=prompt)
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return self._use_cached("scrape", url, cached)
+
+            # Run config (built once per prompt), reusing the session's browser tab
             if use_llm and prompt:
-                extraction_strategy = LLMExtractionStrategy(
+                config = self._get_run_config(("scrape", prompt), lambda: LLMExtractionStrategy(
                     llm_config=self.llm_config,
                     instruction=prompt
-                )
+                ))
+            else:
+                config = self._get_run_config(("scrape", None))
 
-            # Create crawler and run
-            async with AsyncWebCrawler(verbose=False) as crawler:
-                config = CrawlerRunConfig(
-                    extraction_strategy=extraction_strategy
-                )
-                result = await crawler.arun(url=url, config=config)
+            crawler = await self._get_crawler()
+            result = await crawler.arun(url=url, config=config)
 
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = (time.perf_counter_ns() - start_ns) / 1e9
+            timestamp = datetime.now().isoformat()
+
+            # Read the markdown once; it can be large
+            md = result.markdown_v2.raw_markdown if result.success else None
+            md_len = len(md) if md else 0
 
             # Process results
             response = {
                 "success": result.success,
                 "url": url,
                 "status_code": result.status_code,
-                "markdown": result.markdown_v2.raw_markdown if result.success else None,
+                "markdown": md,
                 "extracted_content": result.extracted_content if use_llm else None,
                 "links": {
                     "internal": list(result.links.get("internal", [])) if result.success else [],
@@ -109,21 +417,23 @@ class ScraperAgent:
                 },
                 "metadata": {
                     "duration_seconds": duration,
-                    "content_length": len(result.markdown_v2.raw_markdown) if result.success else 0,
-                    "timestamp": datetime.now().isoformat()
+                    "content_length": md_len,
+                    "timestamp": timestamp
                 }
             }
 
             self.last_result = response
+            if cache_key and result.success:
+                self._cache_put(cache_key, response)
             self.session_history.append({
                 "type": "scrape",
                 "url": url,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "success": result.success
             })
 
             if result.success:
-                self._log_event("info", f"✓ Scraped {len(response['metadata']['content_length'])} chars in {duration:.2f}s")
+                self._log_event("info", f"✓ Scraped {md_len} chars in {duration:.2f}s")
             else:
                 self._log_event("error", f"✗ Failed to scrape {url}: {result.error_message}")
 
@@ -137,65 +447,89 @@ class ScraperAgent:
                 "error": str(e)
             }
 
-    async def extract(self, url: str, schema: Dict[str, str], instruction: Optional[str] = None) -> Dict[str, Any]:
+    async def extract(
+        self,
+        url: str,
+        schema: Dict[str, str],
+        instruction: Optional[str] = None,
+        css_selectors: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        validate: bool = False
+    ) -> Dict[str, Any]:
         """Extract structured data from a webpage using LLM.
 
         Args:
             url: URL to extract from
             schema: Dictionary defining the schema (e.g., {"title": "str", "price": "float"})
             instruction: Optional custom instruction for extraction
+            css_selectors: Optional map of field name to CSS selector; when given,
+                fields are read straight from the page with no LLM call
+            use_cache: Reuse a previous LLM result for the same URL, schema, instruction
+                and validate setting
+            validate: Validate (and coerce) each extracted item against the schema;
+                by default items are returned as parsed
 
         Returns:
             Dictionary with extracted structured data
         """
-        self._log_event("info", f"🤖 Extracting structured data from: {url}")
+        method = "css" if css_selectors else "llm"
+        self._log_event("info", f"🤖 Extracting structured data from: {url} ({method})")
 
         try:
-            start_time = datetime.now()
-
-            # Create Pydantic model from schema dynamically
-            field_definitions = {}
-            for field_name, field_type in schema.items():
-                if field_type == "str":
-                    field_definitions[field_name] = (str, Field(...))
-                elif field_type == "int":
-                    field_definitions[field_name] = (int, Field(...))
-                elif field_type == "float":
-                    field_definitions[field_name] = (float, Field(...))
-                elif field_type == "bool":
-                    field_definitions[field_name] = (bool, Field(...))
-                elif field_type == "list":
-                    field_definitions[field_name] = (List[str], Field(...))
-                else:
-                    field_definitions[field_name] = (str, Field(...))
-
-            ExtractionModel = create_model('ExtractionModel', **field_definitions)
+            start_ns = time.perf_counter_ns()
 
-            # Configure LLM extraction
-            default_instruction = f"Extract the following fields from the webpage: {', '.join(schema.keys())}"
-            extraction_strategy = LLMExtractionStrategy(
-                llm_config=self.llm_config,
-                schema=ExtractionModel.model_json_schema(),
-                extraction_type="schema",
-                instruction=instruction or default_instruction
-            )
+            # Schema signature and effective instruction, shared by the caches below
+            schema_key = tuple(sorted((name, str(field_type)) for name, field_type in schema.items()))
+            instruction = instruction or f"Extract the following fields from the webpage: {', '.join(schema.keys())}"
 
-            # Run extraction
-            async with AsyncWebCrawler(verbose=False) as crawler:
-                config = CrawlerRunConfig(
-                    extraction_strategy=extraction_strategy
+            # LLM results are cached by everything that shapes them
+            cache_key = None
+            if not css_selectors and use_cache:
+                cache_key = self._cache_key(
+                    "extract", url, schema=schema_key, instruction=instruction, validate=validate
+                )
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return self._use_cached("extract", url, cached)
+
+            # Pydantic model for the schema (built once per distinct schema)
+            ExtractionModel, json_schema = self._get_extraction_model(schema, schema_key)
+
+            # Run config (built once per schema and selectors or instruction),
+            # reusing the session's browser tab
+            if css_selectors:
+                config = self._get_run_config(
+                    ("extract", schema_key, tuple(sorted(css_selectors.items()))),
+                    lambda: _build_css_strategy(css_selectors)
+                )
+            else:
+                # Configure LLM extraction
+                config = self._get_run_config(
+                    ("extract", schema_key, instruction),
+                    lambda: LLMExtractionStrategy(
+                        llm_config=self.llm_config,
+                        schema=json_schema,
+                        extraction_type="schema",
+                        instruction=instruction
+                    )
                 )
-                result = await crawler.arun(url=url, config=config)
 
-            duration = (datetime.now() - start_time).total_seconds()
+            crawler = await self._get_crawler()
+            result = await crawler.arun(url=url, config=config)
+
+            duration = (time.perf_counter_ns() - start_ns) / 1e9
+            timestamp = datetime.now().isoformat()
 
             # Parse extracted content
             extracted_data = None
             if result.success and result.extracted_content:
                 try:
-                    extracted_data = json.loads(result.extracted_content)
+                    extracted_data = _loads(result.extracted_content)
                 except json.JSONDecodeError:
                     extracted_data = result.extracted_content
+                else:
+                    if validate:
+                        extracted_data = _validate_extracted(ExtractionModel, extracted_data)
 
             response = {
                 "success": result.success,
@@ -203,16 +537,19 @@ class ScraperAgent:
                 "schema": schema,
                 "extracted_data": extracted_data,
                 "metadata": {
+                    "method": method,
                     "duration_seconds": duration,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": timestamp
                 }
             }
 
             self.last_result = response
+            if cache_key and result.success:
+                self._cache_put(cache_key, response)
             self.session_history.append({
                 "type": "extract",
                 "url": url,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "success": result.success
             })
 
@@ -231,58 +568,155 @@ class ScraperAgent:
                 "error": str(e)
             }
 
-    async def crawl(self, url: str, max_depth: int = 2, max_pages: int = 10) -> Dict[str, Any]:
+    def _get_extraction_model(
+        self,
+        schema: Dict[str, str],
+        key: Tuple[Tuple[str, str], ...]
+    ) -> Tuple[Type[BaseModel], Dict[str, Any]]:
+        """Return the Pydantic model and JSON schema for an extraction schema, cached by its signature key."""
+        cached = self._model_cache.get(key)
+        if cached is None:
+            field_definitions = {
+                field_name: _FIELD_MAP.get(str(field_type), _FIELD_MAP["str"])
+                for field_name, field_type in schema.items()
+            }
+            ExtractionModel = create_model('ExtractionModel', **field_definitions)
+            cached = (ExtractionModel, ExtractionModel.model_json_schema())
+            self._model_cache[key] = cached
+        return cached
+
+    def _get_run_config(
+        self,
+        key: Tuple,
+        make_strategy: Optional[Callable[[], Any]] = None,
+        session_id: str = SESSION_ID
+    ) -> CrawlerRunConfig:
+        """Return the session run config for key, building it (and its strategy) on first use."""
+        config = self._run_config_cache.get(key)
+        if config is None:
+            config = CrawlerRunConfig(
+                extraction_strategy=make_strategy() if make_strategy else None,
+                session_id=session_id
+            )
+            self._run_config_cache[key] = config
+        return config
+
+    async def crawl(
+        self,
+        url: str,
+        max_depth: int = 2,
+        max_pages: int = 10,
+        max_concurrent: int = 5,
+        per_domain_delay: float = 0.0
+    ) -> Dict[str, Any]:
         """Crawl multiple pages starting from a URL.
 
+        Pages are fetched breadth-first from a per-domain queue. Each round
+        takes the next URLs from every domain and fetches them together, with
+        up to max_concurrent fetches in flight at once. With a per_domain_delay,
+        each domain gives one URL per round and fetches from the same domain
+        start at least that many seconds apart.
+
         Args:
             url: Starting URL
             max_depth: Maximum depth to crawl
             max_pages: Maximum number of pages to crawl
+            max_concurrent: Maximum number of pages fetched in parallel
+            per_domain_delay: Minimum seconds between fetches from one domain
 
         Returns:
             Dictionary with crawl results
+
+        Raises:
+            ValueError: If max_concurrent is less than 1
         """
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be at least 1, got {max_concurrent}")
+
         self._log_event("info", f"🕷️  Crawling: {url} (depth={max_depth}, max_pages={max_pages})")
 
         try:
-            start_time = datetime.now()
+            start_ns = time.perf_counter_ns()
             crawled_pages = []
-            to_crawl = [(url, 0)]  # (url, depth)
-            crawled_urls = set()
-
-            async with AsyncWebCrawler(verbose=False) as crawler:
-                while to_crawl and len(crawled_pages) < max_pages:
-                    current_url, depth = to_crawl.pop(0)
-
-                    if current_url in crawled_urls or depth > max_depth:
+            queues: Dict[str, Deque[Tuple[str, int]]] = {}  # domain -> (url, depth) in BFS order
+            queued = {url}  # Every URL ever queued, so each is fetched at most once
+            last_fetch: Dict[str, float] = {}  # domain -> loop time of its last fetch
+            per_round = 1 if per_domain_delay > 0 else max_concurrent
+            loop = asyncio.get_running_loop()
+
+            def enqueue(page_url: str, depth: int):
+                queues.setdefault(urlparse(page_url).netloc, deque()).append((page_url, depth))
+
+            enqueue(url, 0)
+
+            # Each of the max_concurrent fetch slots has its own session, so
+            # its browser tab stays warm across pages (and later crawls); a
+            # fetch holds its slot until it finishes
+            crawler = await self._get_crawler()
+            slots: 'asyncio.Queue[CrawlerRunConfig]' = asyncio.Queue()
+            for slot in range(max_concurrent):
+                slots.put_nowait(self._get_run_config(("crawl", slot), session_id=f"{SESSION_ID}-crawl-{slot}"))
+
+            async def fetch_one(page_url: str, domain: str):
+                config = await slots.get()
+                try:
+                    if per_domain_delay > 0:
+                        wait = last_fetch.get(domain, 0.0) + per_domain_delay - loop.time()
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                        last_fetch[domain] = loop.time()
+                    return await crawler.arun(url=page_url, config=config)
+                finally:
+                    slots.put_nowait(config)
+
+            while queues and len(crawled_pages) < max_pages:
+                # Take the next URLs from each domain, within the page budget
+                batch = []
+                budget = max_pages - len(crawled_pages)
+                for domain in list(queues):
+                    domain_queue = queues[domain]
+                    taken = 0
+                    while domain_queue and taken < per_round and len(batch) < budget:
+                        page_url, depth = domain_queue.popleft()
+                        batch.append((page_url, depth, domain))
+                        taken += 1
+                    if not domain_queue:
+                        del queues[domain]
+
+                for i, (page_url, depth, _) in enumerate(batch, len(crawled_pages) + 1):
+                    logger.info(f"  [{i}/{max_pages}] Depth {depth}: {page_url}")
+
+                results = await asyncio.gather(*(fetch_one(page_url, domain) for page_url, _, domain in batch), return_exceptions=True)
+
+                for (page_url, depth, _), result in zip(batch, results):
+                    if isinstance(result, BaseException):
+                        logger.warning(f"  Failed to crawl {page_url}: {result}")
                         continue
 
-                    logger.info(f"  [{len(crawled_pages) + 1}/{max_pages}] Depth {depth}: {current_url}")
-
-                    config = CrawlerRunConfig()
-                    result = await crawler.arun(url=current_url, config=config)
-
-                    crawled_urls.add(current_url)
-
                     if result.success:
+                        internal_links = list(result.links.get("internal", []))
                         page_data = {
-                            "url": current_url,
+                            "url": page_url,
                             "depth": depth,
-                            "markdown": result.markdown_v2.raw_markdown,
+                            # Kept as UTF-8 bytes: written to disk as-is by save_result
+                            "markdown": _Utf8Text((result.markdown_v2.raw_markdown or "").encode('utf-8')),
                             "links": {
-                                "internal": list(result.links.get("internal", [])),
+                                "internal": internal_links,
                                 "external": list(result.links.get("external", []))
                             }
                         }
                         crawled_pages.append(page_data)
 
-                        # Add internal links to crawl queue if not at max depth
+                        # Queue internal links for the next level if not at max depth
                         if depth < max_depth:
-                            for link in list(result.links.get("internal", []))[:5]:  # Limit links per page
-                                if link not in crawled_urls:
-                                    to_crawl.append((link, depth + 1))
+                            for link in internal_links[:5]:  # Limit links per page
+                                link_url = _link_url(link)
+                                if link_url and link_url not in queued:
+                                    queued.add(link_url)
+                                    enqueue(link_url, depth + 1)
 
-            duration = (datetime.now() - start_time).total_seconds()
+            duration = (time.perf_counter_ns() - start_ns) / 1e9
+            timestamp = datetime.now().isoformat()
 
             response = {
                 "success": True,
@@ -293,7 +727,7 @@ class ScraperAgent:
                     "duration_seconds": duration,
                     "max_depth": max_depth,
                     "max_pages": max_pages,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": timestamp
                 }
             }
 
@@ -302,7 +736,7 @@ class ScraperAgent:
                 "type": "crawl",
                 "url": url,
                 "pages_crawled": len(crawled_pages),
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "success": True
             })
 
@@ -318,49 +752,89 @@ class ScraperAgent:
                 "error": str(e)
             }
 
-    def save_result(self, filename: Optional[str] = None, format: str = "json") -> str:
-        """Save the last result to a file.
+    def _save_chunks(self, format: str) -> Iterable[bytes]:
+        """Encode the last result for saving, as the byte chunks to write in order."""
+        if format == "json":
+            return [_dumps_indented(self.last_result)]
+
+        if "markdown" in self.last_result:
+            return [(self.last_result["markdown"] or "").encode('utf-8')]
+        if "pages" in self.last_result:
+            pages = self.last_result["pages"]
+            chunks = (
+                chunk
+                for page in pages
+                for chunk in (f"\n\n# {page['url']}\n\n".encode('utf-8'), page["markdown"].data)
+            )
+            # Small crawls go out in one write; large ones page by
+            # page so the whole document is never held in memory
+            if sum(len(page["markdown"]) for page in pages) <= _SAVE_JOIN_MAX_BYTES:
+                return [b"".join(chunks)]
+            return chunks
+        return [_dumps_indented(self.last_result)]
+
+    def _save_path(self, filename: Optional[str], format: str) -> Path:
+        """Return the output path, generating a timestamped filename if none is given."""
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            filename = f"scrape-{timestamp}.{format}"
+        return self.output_dir / filename
 
-        Args:
-            filename: Optional filename (auto-generated if not provided)
-            format: Output format (json, md, or txt)
+    def _prepare_save(self, filename: Optional[str], format: str) -> Optional[Tuple[Path, Iterable[bytes]]]:
+        """Return the output path and byte chunks for save_result/save_result_sync.
 
-        Returns:
-            Path to saved file
+        Returns None, after logging why, when there's nothing to save.
         """
         if not self.last_result:
             logger.warning("No results to save")
             return None
+        if format not in ("json", "md", "txt"):
+            logger.warning(f"Unsupported save format: {format}")
+            return None
+        return self._save_path(filename, format), self._save_chunks(format)
 
-        # Generate filename if not provided
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-            filename = f"scrape-{timestamp}.{format}"
+    async def save_result(self, filename: Optional[str] = None, format: str = "json") -> Optional[str]:
+        """Save the last result to a file without blocking the event loop.
 
-        filepath = self.output_dir / filename
+        Args:
+            filename: Optional filename (auto-generated if not provided)
+            format: Output format (json, md, or txt)
 
+        Returns:
+            Path to saved file, or None if nothing was saved
+        """
         try:
-            if format == "json":
-                with open(filepath, 'w') as f:
-                    json.dump(self.last_result, f, indent=2)
-            elif format in ("md", "txt"):
-                with open(filepath, 'w') as f:
-                    if "markdown" in self.last_result:
-                        f.write(self.last_result["markdown"])
-                    elif "pages" in self.last_result:
-                        for page in self.last_result["pages"]:
-                            f.write(f"\n\n# {page['url']}\n\n")
-                            f.write(page["markdown"])
-                    else:
-                        f.write(json.dumps(self.last_result, indent=2))
-
-            logger.info(f"✓ Saved to: {filepath}")
-            return str(filepath)
+            prepared = self._prepare_save(filename, format)
+            if prepared is None:
+                return None
+            filepath, chunks = prepared
+            async with aiofiles.open(filepath, 'wb') as f:
+                for chunk in chunks:
+                    await f.write(chunk)
+        except Exception as e:
+            logger.error(f"Error saving result: {e}")
+            return None
 
+        logger.info(f"✓ Saved to: {filepath}")
+        return str(filepath)
+
+    def save_result_sync(self, filename: Optional[str] = None, format: str = "json") -> Optional[str]:
+        """Save the last result to a file; blocking version of save_result for non-async callers."""
+        try:
+            prepared = self._prepare_save(filename, format)
+            if prepared is None:
+                return None
+            filepath, chunks = prepared
+            with open(filepath, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
         except Exception as e:
             logger.error(f"Error saving result: {e}")
             return None
 
+        logger.info(f"✓ Saved to: {filepath}")
+        return str(filepath)
+
     def show_config(self):
         """Display current configuration."""
         print("\n" + "=" * 60)
@@ -381,7 +855,8 @@ class ScraperAgent:
         print("\n" + "=" * 60)
         print("📜 Session History")
         print("=" * 60)
-        for i, entry in enumerate(self.session_history[-10:], 1):  # Show last 10
+        recent = islice(self.session_history, max(len(self.session_history) - 10, 0), None)
+        for i, entry in enumerate(recent, 1):  # Show last 10
             status = "✓" if entry["success"] else "✗"
             print(f"{i}. {status} [{entry['type']}] {entry['url']}")
             if entry['type'] == 'crawl':
@@ -403,15 +878,22 @@ class ScraperAgent:
   scrape <url> --llm "<prompt>"
       Scrape with LLM-powered extraction using a custom prompt
       Example: scrape https://news.ycombinator.com --llm "Extract the top 5 article titles"
+      Add --no-cache to re-run the LLM instead of reusing a previous result
 
 🎯 Structured Extraction:
   extract <url> <schema>
       Extract structured data using LLM with a defined schema
-      Example: extract https://example.com {"title":"str","price":"float"}
+      Wrap the schema in single quotes so its double quotes survive
+      Example: extract https://example.com '{"title":"str","price":"float"}'
 
   extract <url> <schema> --instruction "<text>"
       Extract with custom instruction
-      Example: extract https://news.ycombinator.com {"title":"str","points":"int"} --instruction "Get top stories"
+      Example: extract https://news.ycombinator.com '{"title":"str","points":"int"}' --instruction "Get top stories"
+
+  extract <url> <schema> --css '<selectors>'
+      Extract fields with CSS selectors instead of the LLM (fast, no tokens)
+      Example: extract https://example.com '{"title":"str"}' --css '{"title":"h1"}'
+      Add --no-cache to re-run the LLM instead of reusing a previous result
 
 🕷️  Multi-Page Crawling:
   crawl <url>
@@ -422,6 +904,10 @@ class ScraperAgent:
       Crawl with custom depth and page limit
       Example: crawl https://docs.example.com --depth 3 --max 20
 
+  crawl <url> --concurrency <n> --delay <seconds>
+      Fetch up to n pages at once; with a delay, space requests to each site
+      Example: crawl https://docs.example.com --concurrency 8 --delay 0.5
+
 💾 Output Management:
   save [filename] [--format json|md|txt]
       Save last result to file (auto-named if filename not provided)
@@ -449,11 +935,108 @@ class ScraperAgent:
   - Use extract command for structured data with defined schemas
   - Results are automatically logged to the proxy dashboard
   - Output files are saved to: scraper_output/
+  - LLM results are cached in scraper_output/.cache/ (use --no-cache to bypass)
 
 ╚══════════════════════════════════════════════════════════════════════╝
 """
         print(help_text)
 
+    # REPL command handlers: each takes the parsed arguments (None for
+    # commands without a parser) and returns True to end the session
+
+    async def _cmd_exit(self, args) -> bool:
+        print("👋 Goodbye!\n")
+        return True
+
+    async def _cmd_help(self, args) -> bool:
+        self.show_help()
+        return False
+
+    async def _cmd_config(self, args) -> bool:
+        self.show_config()
+        return False
+
+    async def _cmd_history(self, args) -> bool:
+        self.show_history()
+        return False
+
+    async def _cmd_clear(self, args) -> bool:
+        _clear_screen()
+        return False
+
+    async def _cmd_scrape(self, args) -> bool:
+        result = await self.scrape(args.url, use_llm=args.llm is not None, prompt=args.llm, use_cache=not args.no_cache)
+
+        if result["success"]:
+            print(f"\n✓ Success!")
+            print(f"  Content: {result['metadata']['content_length']} characters")
+            print(f"  Links: {len(result['links']['internal'])} internal, {len(result['links']['external'])} external")
+            print(f"  Duration: {result['metadata']['duration_seconds']:.2f}s")
+
+            content = result.get("extracted_content") or ""
+            if content:
+                print(f"\n📄 Extracted Content:")
+                print(content[:_PREVIEW_CHARS])
+                if len(content) > _PREVIEW_CHARS:
+                    print("... (truncated)")
+            print()
+        else:
+            print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
+        return False
+
+    async def _cmd_extract(self, args) -> bool:
+        # Parse schema (and CSS selectors, if given) as JSON
+        try:
+            schema = json.loads(args.schema)
+            css_selectors = json.loads(args.css) if args.css else None
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid schema JSON: {e}")
+            print("Tip: wrap JSON in single quotes, e.g. '{\"title\":\"str\"}'")
+            return False
+
+        result = await self.extract(
+            args.url, schema, args.instruction,
+            css_selectors=css_selectors, use_cache=not args.no_cache
+        )
+
+        if result["success"]:
+            print(f"\n✓ Success!")
+            print(f"  Duration: {result['metadata']['duration_seconds']:.2f}s")
+            print(f"\n📊 Extracted Data:")
+            print(json.dumps(result["extracted_data"], indent=2))
+            print()
+        else:
+            print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
+        return False
+
+    async def _cmd_crawl(self, args) -> bool:
+        result = await self.crawl(
+            args.url, max_depth=args.depth, max_pages=args.max,
+            max_concurrent=args.concurrency, per_domain_delay=args.delay
+        )
+
+        if result["success"]:
+            print(f"\n✓ Crawled {result['pages_crawled']} pages in {result['metadata']['duration_seconds']:.2f}s")
+            for i, page in enumerate(result["pages"][:5], 1):  # Show first 5
+                print(f"  {i}. [Depth {page['depth']}] {page['url']}")
+            if result['pages_crawled'] > 5:
+                print(f"  ... and {result['pages_crawled'] - 5} more pages")
+            print()
+        else:
+            print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
+        return False
+
+    async def _cmd_save(self, args) -> bool:
+        # export has no filename argument; save_result generates one
+        if not self.last_result:
+            print("No results to save\n")
+            return False
+
+        filepath = await self.save_result(getattr(args, "filename", None), args.format)
+        if filepath:
+            print(f"✓ Saved to: {filepath}\n")
+        return False
+
     async def repl(self):
         """Run the interactive REPL."""
         print("\n" + "=" * 70)
@@ -464,6 +1047,13 @@ class ScraperAgent:
         print("\nType 'help' for available commands or 'exit' to quit")
         print("=" * 70 + "\n")
 
+        try:
+            await self._repl_loop()
+        finally:
+            await self.aclose()
+
+    async def _repl_loop(self):
+        """Read and dispatch REPL commands until the user quits."""
         while True:
             try:
                 # Get user input
@@ -473,163 +1063,31 @@ class ScraperAgent:
                     continue
 
                 # Parse command
-                parts = user_input.split()
-                command = parts[0].lower()
-
-                # Handle commands
-                if command in ("exit", "quit"):
-                    print("👋 Goodbye!\n")
-                    break
-
-                elif command == "help":
-                    self.show_help()
-
-                elif command == "config":
-                    self.show_config()
-
-                elif command == "history":
-                    self.show_history()
-
-                elif command == "clear":
-                    os.system('clear' if os.name != 'nt' else 'cls')
-
-                elif command == "scrape":
-                    if len(parts) < 2:
-                        print("Usage: scrape <url> [--llm \"<prompt>\"]")
-                        continue
-
-                    url = parts[1]
-                    use_llm = "--llm" in user_input
-                    prompt = None
-
-                    if use_llm:
-                        # Extract prompt from quotes
-                        try:
-                            prompt_start = user_input.index('"') + 1
-                            prompt_end = user_input.rindex('"')
-                            prompt = user_input[prompt_start:prompt_end]
-                        except ValueError:
-                            print("Error: LLM prompt must be in quotes")
-                            continue
-
-                    result = await self.scrape(url, use_llm=use_llm, prompt=prompt)
-
-                    if result["success"]:
-                        print(f"\n✓ Success!")
-                        print(f"  Content: {result['metadata']['content_length']} characters")
-                        print(f"  Links: {len(result['links']['internal'])} internal, {len(result['links']['external'])} external")
-                        print(f"  Duration: {result['metadata']['duration_seconds']:.2f}s")
-
-                        if result.get("extracted_content"):
-                            print(f"\n📄 Extracted Content:")
-                            print(result["extracted_content"][:500])  # Show first 500 chars
-                            if len(result["extracted_content"]) > 500:
-                                print("... (truncated)")
-                        print()
-                    else:
-                        print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
-
-                elif command == "extract":
-                    if len(parts) < 3:
-                        print("Usage: extract <url> <schema> [--instruction \"<text>\"]")
-                        print("Example: extract https://example.com {\"title\":\"str\",\"price\":\"float\"}")
-                        continue
-
-                    url = parts[1]
+                try:
+                    tokens = shlex.split(user_input)
+                except ValueError as e:
+                    print(f"Error: {e}\n")
+                    continue
+                if not tokens:
+                    continue
+                command = tokens[0].lower()
 
-                    # Parse schema (JSON)
+                args = None
+                parser = self._parsers.get(command)
+                if parser is not None:
                     try:
-                        schema_start = user_input.index("{")
-                        schema_end = user_input.rindex("}") + 1
-                        schema_str = user_input[schema_start:schema_end]
-                        schema = json.loads(schema_str)
-                    except (ValueError, json.JSONDecodeError) as e:
-                        print(f"Error: Invalid schema JSON: {e}")
-                        continue
-
-                    # Extract instruction if provided
-                    instruction = None
-                    if "--instruction" in user_input:
-                        try:
-                            inst_start = user_input.rindex('"', 0, user_input.rindex('"')) + 1
-                            inst_end = user_input.rindex('"')
-                            instruction = user_input[inst_start:inst_end]
-                        except ValueError:
-                            print("Warning: Could not parse instruction")
-
-                    result = await self.extract(url, schema, instruction)
-
-                    if result["success"]:
-                        print(f"\n✓ Success!")
-                        print(f"  Duration: {result['metadata']['duration_seconds']:.2f}s")
-                        print(f"\n📊 Extracted Data:")
-                        print(json.dumps(result["extracted_data"], indent=2))
-                        print()
-                    else:
-                        print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
-
-                elif command == "crawl":
-                    if len(parts) < 2:
-                        print("Usage: crawl <url> [--depth <n>] [--max <n>]")
-                        continue
-
-                    url = parts[1]
-                    max_depth = 2
-                    max_pages = 10
-
-                    # Parse optional flags
-                    if "--depth" in parts:
-                        try:
-                            depth_idx = parts.index("--depth")
-                            max_depth = int(parts[depth_idx + 1])
-                        except (ValueError, IndexError):
-                            print("Warning: Invalid depth value, using default (2)")
-
-                    if "--max" in parts:
-                        try:
-                            max_idx = parts.index("--max")
-                            max_pages = int(parts[max_idx + 1])
-                        except (ValueError, IndexError):
-                            print("Warning: Invalid max value, using default (10)")
-
-                    result = await self.crawl(url, max_depth=max_depth, max_pages=max_pages)
-
-                    if result["success"]:
-                        print(f"\n✓ Crawled {result['pages_crawled']} pages in {result['metadata']['duration_seconds']:.2f}s")
-                        for i, page in enumerate(result["pages"][:5], 1):  # Show first 5
-                            print(f"  {i}. [Depth {page['depth']}] {page['url']}")
-                        if result['pages_crawled'] > 5:
-                            print(f"  ... and {result['pages_crawled'] - 5} more pages")
-                        print()
-                    else:
-                        print(f"\n✗ Failed: {result.get('error', 'Unknown error')}\n")
-
-                elif command in ("save", "export"):
-                    if not self.last_result:
-                        print("No results to save\n")
+                        args = parser.parse_args(tokens[1:])
+                    except _ReplUsageError as e:
+                        print(f"Error: {e}")
+                        print(parser.format_usage())
                         continue
 
-                    filename = None
-                    format = "json"
-
-                    if command == "save" and len(parts) > 1:
-                        filename = parts[1]
-                        if "--format" in parts:
-                            try:
-                                format_idx = parts.index("--format")
-                                format = parts[format_idx + 1]
-                            except IndexError:
-                                pass
-                    elif command == "export" and len(parts) > 1:
-                        format = parts[1]
-
-                    filepath = self.save_result(filename, format)
-                    if filepath:
-                        print(f"✓ Saved to: {filepath}\n")
-
-                else:
+                handler = self._handlers.get(command)
+                if handler is None:
                     print(f"Unknown command: {command}")
                     print("Type 'help' for available commands\n")
+                elif await handler(args):
+                    break
 
             except KeyboardInterrupt:
                 print("\n\n👋 Goodbye!\n")
@@ -21,20 +21,64 @@ Configuration:
     - TEST_MODEL: Model to test (REQUIRED - e.g., gpt-5, gpt-5-mini, gpt-4o)
     - GPT5_VERBOSITY: For GPT-5 models - low/medium/high (optional, default: medium)
     - GPT5_REASONING_EFFORT: For GPT-5 models - minimal/low/medium/high (optional)
+    - BATCH_PROBES: true to ask all three test questions in one request (optional, default: false)
 """
 
 import os
+import re
 import sys
 import time
 import json
+import asyncio
 import requests
-from typing import Optional
+from types import SimpleNamespace
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Load environment variables
 load_dotenv()
 
+def _loads(data):
+    """Parse a JSON response body, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_indented(data) -> str:
+    """Format data as indented JSON text, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
+# The three test questions, in test order
+PROBE_PROMPTS = (
+    "What tools and capabilities do you have access to? Can you search the web? List all available tools you can use.",
+    "What is the current weather in New York City right now? If you can search the web, please do so.",
+    "Search the web for the latest news headlines today. Use any web search tools you have available.",
+)
+
+# System prompt for BATCH_PROBES, asking for one JSON answer per question
+BATCH_SYSTEM_PROMPT = (
+    f"Answer each of the following {len(PROBE_PROMPTS)} questions and return JSON with keys "
+    + ",".join(f"q{i}" for i in range(1, len(PROBE_PROMPTS) + 1))
+    + ". If you have web-search tools, use them."
+)
+
+# Phrases suggesting the model describes tools it can use
+_TOOL_RE = re.compile(
+    r'web search|search the web|browse|internet search|tool|function|capability|access to',
+    re.IGNORECASE
+)
+
 
 def setup_rbc_security():
     """Setup RBC Security SSL certificates if available."""
@@ -67,9 +111,30 @@ class RBCOAuthManager:
         self.client_secret = client_secret
         self.scope = scope
         self._access_token: Optional[str] = None
+        self._expires_at: float = 0.0  # time.monotonic() deadline for the cached token
+
+        # One session for both auth attempts and any refresh, retrying
+        # transient failures with backoff
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
 
     def get_token(self) -> str:
-        """Fetch OAuth token using client credentials flow."""
+        """Fetch OAuth token using client credentials flow.
+
+        The token is cached until 30 seconds before it expires.
+        """
+        if self._access_token and time.monotonic() < self._expires_at - 30:
+            return self._access_token
+
         print(f"🔐 Fetching OAuth token from {self.token_endpoint}")
 
         data = {
@@ -84,7 +149,7 @@ class RBCOAuthManager:
         auth = HTTPBasicAuth(self.client_id, self.client_secret)
 
         try:
-            response = requests.post(
+            response = self._session.post(
                 self.token_endpoint,
                 data=data,
                 auth=auth,
@@ -98,7 +163,7 @@ class RBCOAuthManager:
                 data['client_id'] = self.client_id
                 data['client_secret'] = self.client_secret
 
-                response = requests.post(
+                response = self._session.post(
                     self.token_endpoint,
                     data=data,
                     headers={'Content-Type': 'application/x-www-form-urlencoded'},
@@ -106,20 +171,24 @@ class RBCOAuthManager:
                 )
 
             if not response.ok:
-                error_detail = ""
-                try:
-                    error_data = response.json()
-                    error_detail = f": {json.dumps(error_data, indent=2)}"
-                except:
-                    error_detail = f": {response.text}"
+                # Raw body, pretty-printed only when the server says it's JSON
+                error_detail = f": {response.text}"
+                if response.headers.get('Content-Type', '').startswith('application/json'):
+                    try:
+                        error_detail = f": {_dumps_indented(_loads(response.content))}"
+                    except ValueError:
+                        pass
 
                 raise Exception(f"OAuth request failed with status {response.status_code}{error_detail}")
 
-            response.raise_for_status()
-            token_data = response.json()
+            token_data = _loads(response.content)
 
             self._access_token = token_data.get('access_token')
             expires_in = token_data.get('expires_in', 'unknown')
+            try:
+                self._expires_at = time.monotonic() + int(expires_in)
+            except (TypeError, ValueError):
+                self._expires_at = 0.0  # Unknown lifetime: fetch again next time
 
             print(f"✅ OAuth token obtained (expires in {expires_in}s)")
             return self._access_token
@@ -128,17 +197,114 @@ class RBCOAuthManager:
             print(f"❌ Failed to fetch OAuth token: {e}")
             raise
 
+    def close(self):
+        """Close the token endpoint session."""
+        self._session.close()
+
+
+class _Streamed(SimpleNamespace):
+    """SimpleNamespace with the model_dump() of the SDK objects it stands in for."""
+
+    def model_dump(self) -> dict:
+        def dump(value):
+            if isinstance(value, SimpleNamespace):
+                return {key: dump(item) for key, item in vars(value).items()}
+            if isinstance(value, list):
+                return [dump(item) for item in value]
+            return value
+        return dump(self)
+
+
+async def collect_stream(stream, label: str, started: float) -> _Streamed:
+    """Accumulate a streamed chat completion into the shape of a non-streamed one.
+
+    choices[0].message has role, content and tool_calls (deltas merged by
+    index), plus any other delta fields the endpoint sends (strings are
+    concatenated, other values keep the latest). chunks holds every raw
+    chunk's model_dump(). The time to first token is printed, measured from
+    started (a time.monotonic() value), as soon as it is known.
+    """
+    role = "assistant"
+    parts = []
+    tool_calls = {}
+    extra = {}
+    chunks = []
+
+    async for chunk in stream:
+        raw = chunk.model_dump()
+        chunks.append(raw)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        for key, value in (raw["choices"][0].get("delta") or {}).items():
+            if key in ("role", "content", "tool_calls") or value is None:
+                continue
+            if isinstance(value, str) and isinstance(extra.get(key), str):
+                extra[key] += value
+            else:
+                extra[key] = value
+        if not parts and not tool_calls and (delta.content or delta.tool_calls):
+            print(f"   ⏱️  {label}: first token after {time.monotonic() - started:.2f}s")
+        if getattr(delta, 'role', None):
+            role = delta.role
+        if delta.content:
+            parts.append(delta.content)
+        for tc in delta.tool_calls or []:
+            call = tool_calls.get(tc.index)
+            if call is None:
+                call = tool_calls[tc.index] = SimpleNamespace(
+                    id=tc.id, type=tc.type or "function",
+                    function=SimpleNamespace(name="", arguments="")
+                )
+            if tc.id:
+                call.id = tc.id
+            if tc.function:
+                call.function.name += tc.function.name or ""
+                call.function.arguments += tc.function.arguments or ""
+
+    message = _Streamed(
+        role=role,
+        content="".join(parts) or None,
+        tool_calls=[tool_calls[i] for i in sorted(tool_calls)] or None,
+        **extra
+    )
+    return _Streamed(choices=[_Streamed(message=message)], chunks=chunks)
+
+
+def split_batched(response: _Streamed, count: int) -> List[_Streamed]:
+    """Split a batched probe response into one response per question.
+
+    Answers are expected as a JSON object keyed q1..qN. Tool calls belong to
+    the whole request, so every part carries them, along with the other
+    message fields and the raw chunks. If the content isn't that JSON, the
+    first part gets all of it.
+    """
+    message = response.choices[0].message
+    answers = {}
+    if message.content:
+        text = message.content
+        start, end = text.find('{'), text.rfind('}')
+        try:
+            answers = _loads(text[start:end + 1]) if start != -1 else {}
+        except ValueError:
+            answers = {}
+        if not isinstance(answers, dict) or not answers:
+            print("⚠️  Batched response is not the expected JSON; showing it under Test 1")
+            answers = {"q1": text}
+
+    parts = []
+    for i in range(1, count + 1):
+        answer = answers.get(f"q{i}")
+        if answer is not None and not isinstance(answer, str):
+            answer = _dumps_indented(answer)
+        part = _Streamed(**{**vars(message), "content": answer})
+        parts.append(_Streamed(choices=[_Streamed(message=part)], chunks=response.chunks))
+    return parts
+
 
 def test_openai_tools():
     """Test OpenAI endpoint for built-in tools like web search."""
 
-    # Setup RBC Security first (if available)
-    print("=" * 80)
-    print("🔧 Setup")
-    print("=" * 80)
-    setup_rbc_security()
-    print()
-
     # Configuration
     oauth_endpoint = os.getenv('OAUTH_TOKEN_ENDPOINT')
     oauth_client_id = os.getenv('OAUTH_CLIENT_ID')
@@ -148,6 +314,7 @@ def test_openai_tools():
     test_model = os.getenv('TEST_MODEL')
     gpt5_verbosity = os.getenv('GPT5_VERBOSITY', 'medium')
     gpt5_reasoning_effort = os.getenv('GPT5_REASONING_EFFORT')
+    batch_probes = os.getenv('BATCH_PROBES', 'false').lower() == 'true'
 
     # Validate configuration
     if not all([oauth_endpoint, oauth_client_id, oauth_client_secret, target_endpoint, test_model]):
@@ -165,6 +332,16 @@ def test_openai_tools():
         print("\nSet these in your .env file or environment.")
         sys.exit(1)
 
+    # Imported here so a misconfigured run doesn't pay for loading the SDK
+    from openai import AsyncOpenAI
+
+    # Setup RBC Security once the configuration is known to be usable
+    print("=" * 80)
+    print("🔧 Setup")
+    print("=" * 80)
+    setup_rbc_security()
+    print()
+
     # Detect if using GPT-5 model
     is_gpt5 = test_model.startswith('gpt-5')
 
@@ -181,6 +358,7 @@ def test_openai_tools():
         print("ℹ️  Note: GPT-5 only supports temperature=1 (default)")
     print()
 
+    oauth_manager = None
     try:
         # Step 1: Get OAuth token
         oauth_manager = RBCOAuthManager(
@@ -192,48 +370,73 @@ def test_openai_tools():
         access_token = oauth_manager.get_token()
         print()
 
-        # Step 2: Initialize OpenAI client with custom endpoint
-        print(f"🔧 Initializing OpenAI client with custom endpoint...")
-        client = OpenAI(
-            api_key=access_token,
-            base_url=target_endpoint
-        )
-        print("✅ OpenAI client initialized")
+        def build_params(content: str, system: Optional[str] = None) -> dict:
+            """Build chat completion parameters for a single-turn probe."""
+            messages = [{"role": "system", "content": system}] if system else []
+            messages.append({"role": "user", "content": content})
+            params = {
+                "model": test_model,
+                "messages": messages
+            }
+            # Add GPT-5 specific parameters if applicable
+            if is_gpt5:
+                params["verbosity"] = gpt5_verbosity
+                if gpt5_reasoning_effort:
+                    params["reasoning_effort"] = gpt5_reasoning_effort
+                # Don't set temperature for GPT-5 (only supports default value of 1)
+            else:
+                # For non-GPT-5 models, use temperature
+                params["temperature"] = 0.1
+            return params
+
+        async def create(client, params: dict, label: str):
+            try:
+                started = time.monotonic()
+                stream = await client.chat.completions.create(**params, stream=True)
+                return await collect_stream(stream, label, started)
+            except Exception as e:
+                print(f"❌ API request failed: {e}")
+                print(f"Request params: {json.dumps(params, indent=2)}")
+                raise
+
+        async def run_probes(description: str, probes: List[tuple]):
+            """Send (label, params) probes concurrently, returning their responses in order."""
+            # Step 2: One client for all probes, so they share its connection
+            # pool; closed on the way out
+            print(f"🔧 Initializing OpenAI client with custom endpoint...")
+            async with AsyncOpenAI(api_key=access_token, base_url=target_endpoint) as client:
+                print("✅ OpenAI client initialized")
+                print()
+
+                print(f"📨 {description}...")
+                return await asyncio.gather(*(
+                    create(client, params, label) for label, params in probes
+                ))
+
+        if batch_probes:
+            # One round-trip for all three questions
+            batched_prompt = "\n".join(f"q{i}: {prompt}" for i, prompt in enumerate(PROBE_PROMPTS, 1))
+            (batched,) = asyncio.run(run_probes(
+                "Sending 3 test queries in one batched request",
+                [("Batch", build_params(batched_prompt, system=BATCH_SYSTEM_PROMPT))]
+            ))
+            response, response2, response3 = split_batched(batched, len(PROBE_PROMPTS))
+        else:
+            # The three probes are independent, so send them all at once
+            response, response2, response3 = asyncio.run(run_probes(
+                "Sending 3 test queries concurrently",
+                [(f"Test {i}", build_params(prompt)) for i, prompt in enumerate(PROBE_PROMPTS, 1)]
+            ))
         print()
 
+        # Set by any test whose response made tool calls
+        tools_detected = False
+
         # Step 3: Test 1 - Ask about available tools
         print("=" * 80)
         print("Test 1: Ask model about its capabilities")
         print("=" * 80)
 
-        # Build request parameters
-        request_params = {
-            "model": test_model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": "What tools and capabilities do you have access to? Can you search the web? List all available tools you can use."
-                }
-            ]
-        }
-
-        # Add GPT-5 specific parameters if applicable
-        if is_gpt5:
-            request_params["verbosity"] = gpt5_verbosity
-            if gpt5_reasoning_effort:
-                request_params["reasoning_effort"] = gpt5_reasoning_effort
-            # Don't set temperature for GPT-5 (only supports default value of 1)
-        else:
-            # For non-GPT-5 models, use temperature
-            request_params["temperature"] = 0.1
-
-        try:
-            response = client.chat.completions.create(**request_params)
-        except Exception as e:
-            print(f"❌ API request failed: {e}")
-            print(f"Request params: {json.dumps(request_params, indent=2)}")
-            raise
-
         # Debug: Print full response structure
         print("🔍 Debug - Full Response Structure:")
         print(f"   Response type: {type(response)}")
@@ -260,18 +463,14 @@ def test_openai_tools():
         print()
 
         content = response.choices[0].message.content
+        if getattr(response.choices[0].message, 'tool_calls', None):
+            tools_detected = True
 
         if content:
             print(f"\n📝 Model Response:\n{content}\n")
 
             # Check if response mentions web search or tools
-            response_lower = content.lower()
-            has_tools_mention = any(keyword in response_lower for keyword in [
-                'web search', 'search the web', 'browse', 'internet search',
-                'tool', 'function', 'capability', 'access to'
-            ])
-
-            if has_tools_mention:
+            if _TOOL_RE.search(content) is not None:
                 print("✅ Model mentions tools/capabilities in response")
             else:
                 print("⚠️  Model does not explicitly mention tools")
@@ -293,25 +492,6 @@ def test_openai_tools():
         print("=" * 80)
         print("Asking: 'What is the current weather in New York City right now?'\n")
 
-        request_params2 = {
-            "model": test_model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": "What is the current weather in New York City right now? If you can search the web, please do so."
-                }
-            ]
-        }
-
-        if is_gpt5:
-            request_params2["verbosity"] = gpt5_verbosity
-            if gpt5_reasoning_effort:
-                request_params2["reasoning_effort"] = gpt5_reasoning_effort
-        else:
-            request_params2["temperature"] = 0.1
-
-        response2 = client.chat.completions.create(**request_params2)
-
         content2 = response2.choices[0].message.content
 
         if content2:
@@ -321,6 +501,7 @@ def test_openai_tools():
 
         # Check for tool usage indicators
         if hasattr(response2.choices[0].message, 'tool_calls') and response2.choices[0].message.tool_calls:
+            tools_detected = True
             print("🎉 FOUND TOOL CALLS!")
             print(f"Number of tool calls: {len(response2.choices[0].message.tool_calls)}")
             for i, tool_call in enumerate(response2.choices[0].message.tool_calls):
@@ -340,25 +521,6 @@ def test_openai_tools():
         print("=" * 80)
         print("Asking: 'Search the web for the latest news today'\n")
 
-        request_params3 = {
-            "model": test_model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": "Search the web for the latest news headlines today. Use any web search tools you have available."
-                }
-            ]
-        }
-
-        if is_gpt5:
-            request_params3["verbosity"] = gpt5_verbosity
-            if gpt5_reasoning_effort:
-                request_params3["reasoning_effort"] = gpt5_reasoning_effort
-        else:
-            request_params3["temperature"] = 0.1
-
-        response3 = client.chat.completions.create(**request_params3)
-
         content3 = response3.choices[0].message.content
 
         if content3:
@@ -367,6 +529,7 @@ def test_openai_tools():
             print("⚠️  Response content is None (checking for tool_calls...)\n")
 
         if hasattr(response3.choices[0].message, 'tool_calls') and response3.choices[0].message.tool_calls:
+            tools_detected = True
             print("🎉 FOUND TOOL CALLS!")
             for i, tool_call in enumerate(response3.choices[0].message.tool_calls):
                 print(f"\nTool Call {i+1}:")
@@ -385,13 +548,6 @@ def test_openai_tools():
         print(f"✅ Model '{test_model}' is accessible")
         print(f"✅ Completed {3} test queries")
 
-        # Check if any tools were detected
-        tools_detected = False
-        for resp in [response, response2, response3]:
-            if hasattr(resp.choices[0].message, 'tool_calls') and resp.choices[0].message.tool_calls:
-                tools_detected = True
-                break
-
         if tools_detected:
             print("\n🎉 RESULT: Built-in tools (possibly web search) ARE AVAILABLE!")
         else:
@@ -406,6 +562,9 @@ def test_openai_tools():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if oauth_manager:
+            oauth_manager.close()
 
 
 if __name__ == '__main__':
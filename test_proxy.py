@@ -13,10 +13,17 @@ Usage:
 import os
 import sys
 import json
-import requests
-from typing import Dict, Any
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load .env file
 load_dotenv()
 
@@ -25,27 +32,65 @@ PROXY_URL = os.getenv('PROXY_URL', 'http://localhost:3000')
 PROXY_TOKEN = os.getenv('PROXY_ACCESS_TOKEN', 'your-static-proxy-token-here')
 TEST_MODEL = os.getenv('TEST_MODEL', 'gpt-4')  # Model to use for testing
 
-# Test tracking
+# One HTTP/2 client for every test (when the h2 package is installed), so the
+# parallel tests share multiplexed, kept-alive connections. The pool is sized
+# above the number of parallel tests, and failed connects are retried briefly.
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+SESSION = httpx.Client(
+    timeout=10.0,
+    transport=httpx.HTTPTransport(
+        http2=_HTTP2,
+        retries=2,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    ),
+    headers={
+        'Authorization': f'Bearer {PROXY_TOKEN}',
+        'Content-Type': 'application/json'
+    }
+)
+
+def _loads(data):
+    """Parse a JSON response body, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Test tracking (tests run in parallel, see main)
 tests_passed = 0
 tests_failed = 0
+_counter_lock = threading.Lock()
+_output = threading.local()  # .lines buffers a running test's log lines
 
 
 def log(emoji: str, message: str):
-    """Print a log message."""
-    print(f"{emoji} {message}")
+    """Print a log message, or buffer it while a test is running."""
+    line = f"{emoji} {message}"
+    lines = getattr(_output, 'lines', None)
+    if lines is None:
+        print(line)
+    else:
+        lines.append(line)
 
 
 def log_success(message: str):
     """Log a successful test."""
     global tests_passed
-    tests_passed += 1
+    with _counter_lock:
+        tests_passed += 1
     log("✅", message)
 
 
 def log_error(message: str):
     """Log a failed test."""
     global tests_failed
-    tests_failed += 1
+    with _counter_lock:
+        tests_failed += 1
     log("❌", message)
 
 
@@ -59,25 +104,13 @@ def make_request(
     path: str,
     headers: Dict[str, str] = None,
     json_data: Dict[str, Any] = None
-) -> requests.Response:
-    """Make a request to the proxy."""
+) -> httpx.Response:
+    """Make a request to the proxy (headers override the session defaults)."""
     url = f"{PROXY_URL}{path}"
-    default_headers = {
-        'Authorization': f'Bearer {PROXY_TOKEN}',
-        'Content-Type': 'application/json'
-    }
-
-    if headers:
-        default_headers.update(headers)
 
     try:
-        if method == 'GET':
-            return requests.get(url, headers=default_headers, timeout=10)
-        elif method == 'POST':
-            return requests.post(url, headers=default_headers, json=json_data, timeout=10)
-        elif method == 'DELETE':
-            return requests.delete(url, headers=default_headers, timeout=10)
-    except requests.exceptions.ConnectionError:
+        return SESSION.request(method, url, headers=headers, json=json_data)
+    except httpx.ConnectError:
         log_error(f"Cannot connect to proxy at {PROXY_URL}")
         log_info("   Make sure the proxy is running: ./run-dev.sh")
         sys.exit(1)
@@ -90,10 +123,10 @@ def test_health_check():
     """Test the health check endpoint."""
     log_info("Test 1: Health check endpoint")
     try:
-        response = requests.get(f"{PROXY_URL}/health", timeout=10)
+        response = SESSION.get(f"{PROXY_URL}/health")
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('status') == 'healthy':
                 dev_mode = data.get('devMode', False)
                 mode_str = "DEV MODE" if dev_mode else "PRODUCTION MODE"
@@ -110,10 +143,10 @@ def test_proxy_config():
     """Test proxy configuration endpoint."""
     log_info("Test 2: Proxy configuration")
     try:
-        response = requests.get(f"{PROXY_URL}/api/config", timeout=10)
+        response = SESSION.get(f"{PROXY_URL}/api/config")
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             log_info(f"   Placeholder Mode: {data.get('usePlaceholderMode')}")
             log_info(f"   OAuth Configured: {data.get('oauthConfigured')}")
             log_info(f"   Dev Mode: {data.get('devMode')}")
@@ -132,7 +165,7 @@ def test_list_models():
         response = make_request('GET', '/v1/models')
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('object') == 'list' and isinstance(data.get('data'), list):
                 model_count = len(data['data'])
                 models = [m['id'] for m in data['data']]
@@ -157,7 +190,7 @@ def test_get_model():
         response = make_request('GET', f'/v1/models/{TEST_MODEL}')
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('id') == TEST_MODEL:
                 log_success(f"Specific model retrieved: {TEST_MODEL}")
             else:
@@ -185,7 +218,7 @@ def test_chat_completion_basic():
         })
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('choices') and len(data['choices']) > 0:
                 message = data['choices'][0].get('message', {})
                 content = message.get('content', '')
@@ -199,7 +232,7 @@ def test_chat_completion_basic():
         elif response.status_code >= 500:
             log_error(f"Chat completion failed with server error: {response.status_code}")
             try:
-                error_data = response.json()
+                error_data = _loads(response.content)
                 log_info(f"   Error: {error_data.get('error', {}).get('message', 'Unknown')}")
             except:
                 pass
@@ -229,7 +262,7 @@ def test_chat_completion_with_params():
         })
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('choices'):
                 log_success("Chat completion with parameters successful")
             else:
@@ -255,7 +288,7 @@ def test_text_completion():
         })
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if data.get('choices'):
                 log_success("Text completion successful")
             else:
@@ -290,7 +323,7 @@ def test_dashboard():
     """Test dashboard accessibility."""
     log_info("Test 6: Dashboard accessibility")
     try:
-        response = requests.get(PROXY_URL, timeout=10)
+        response = SESSION.get(PROXY_URL)
 
         if response.status_code == 200:
             if 'html' in response.headers.get('Content-Type', '').lower():
@@ -307,10 +340,10 @@ def test_dashboard_api_logs():
     """Test dashboard API logs endpoint."""
     log_info("Test 7: Dashboard API - logs endpoint")
     try:
-        response = requests.get(f"{PROXY_URL}/api/logs", timeout=10)
+        response = SESSION.get(f"{PROXY_URL}/api/logs")
 
         if response.status_code == 200:
-            data = response.json()
+            data = _loads(response.content)
             if 'apiCalls' in data and 'serverEvents' in data:
                 log_success("Dashboard API logs endpoint working")
             else:
@@ -321,6 +354,22 @@ def test_dashboard_api_logs():
         log_error(f"Dashboard API logs error: {e}")
 
 
+def run_buffered(test: Callable[[], None]) -> Tuple[List[str], Optional[SystemExit]]:
+    """Run a test, returning its log lines and the exit it requested, if any.
+
+    make_request exits when the proxy is unreachable; the exit is handed back
+    so main can raise it after printing the lines that explain it.
+    """
+    _output.lines = lines = []
+    try:
+        test()
+    except SystemExit as e:
+        return lines, e
+    finally:
+        _output.lines = None
+    return lines, None
+
+
 def print_summary():
     """Print test summary."""
     total = tests_passed + tests_failed
@@ -355,14 +404,23 @@ def main():
     print(f"🔑 Using access token: {PROXY_TOKEN[:30]}...")
     print(f"🤖 Test model: {TEST_MODEL}\n")
 
-    # Run tests
-    test_health_check()
-    test_proxy_config()
-    test_chat_completion_basic()
-    test_chat_completion_with_params()
-    test_authentication()
-    test_dashboard()
-    test_dashboard_api_logs()
+    # Run tests in parallel; each test's output is printed in order, in one piece
+    tests = [
+        test_health_check,
+        test_proxy_config,
+        test_chat_completion_basic,
+        test_chat_completion_with_params,
+        test_authentication,
+        test_dashboard,
+        test_dashboard_api_logs,
+    ]
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        for lines, exit_request in executor.map(run_buffered, tests):
+            print("\n".join(lines))
+            if exit_request is not None:
+                raise exit_request
+
+    SESSION.close()
 
     # Print summary
     print_summary()